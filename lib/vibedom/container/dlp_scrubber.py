@@ -1,15 +1,27 @@
 """Lightweight DLP scrubber for secret and PII detection.
 
 Loads secret patterns from gitleaks.toml (shared with pre-flight scanning)
-and provides built-in PII patterns. Zero external dependencies.
+and provides built-in PII patterns. Zero external dependencies. With the
+optional ``re2`` extra (google-re2) installed, gitleaks rules it supports
+are matched with RE2 -- the engine they are written for, in linear time;
+the built-in PII patterns always use ``re``, whose \\d, \\w and \\b are
+Unicode-aware.
 """
 
+import functools
 import json
+import operator
 import re
 import sys
 import tomllib
 from dataclasses import dataclass, field
 from pathlib import Path
+from re import _constants as sre_constants, _parser as sre_parser
+
+try:
+    import re2
+except ImportError:
+    re2 = None
 
 
 # Maximum text size to scrub (skip large binary-decoded content)
@@ -17,21 +29,151 @@ MAX_SCRUB_SIZE = 512_000  # 512KB
 
 # Chunking settings for large files
 CHUNK_SIZE = 512_000  # 512KB chunks
-OVERLAP = 2000  # 2KB overlap to catch secrets at boundaries
-
-
-@dataclass
+OVERLAP = 2000  # max overlap to catch secrets at boundaries (2KB)
+
+# Group backreferences (\1, (?P=name)) would be renumbered inside a
+# combined pattern
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _prefer_re2(regex: re.Pattern) -> re.Pattern:
+    """Return an RE2 compile of a gitleaks rule if google-re2 is installed and supports it.
+
+    RE2 has no lookarounds or backreferences; such rules (and every rule,
+    when google-re2 isn't installed) keep their ``re`` compile. The RE2
+    object is a drop-in for the ``finditer``/``search``/``pattern``/``groups``
+    API the scrubber uses.
+    """
+    if re2 is None:
+        return regex
+    options = re2.Options()
+    options.log_errors = False
+    try:
+        return re2.compile(regex.pattern, options)
+    except re2.error:
+        return regex
+
+
+def _required_literal(source: str) -> str | None:
+    """The longest literal substring every match of the pattern must contain.
+
+    Walks the parsed pattern, collecting runs of literal characters that
+    are not optional (outside alternations, optional repeats and
+    lookarounds). Under case-insensitive matching only caseless characters
+    count. Returns None if there is no such literal, e.g. for an
+    alternation like ``(password|passwd)``.
+    """
+    try:
+        parsed = sre_parser.parse(source)
+    except re.error:
+        return None
+
+    best = ''
+
+    def walk(items, ignorecase: bool) -> None:
+        nonlocal best
+        run = ''
+        for op, av in items:
+            if op is sre_constants.LITERAL and not (ignorecase and chr(av).lower() != chr(av).upper()):
+                run += chr(av)
+                continue
+            best = max(best, run, key=len)
+            run = ''
+            if op is sre_constants.SUBPATTERN:
+                _group, add_flags, del_flags, subpattern = av
+                walk(subpattern, bool((ignorecase or add_flags & re.IGNORECASE)
+                                      and not del_flags & re.IGNORECASE))
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+                walk(av[2], ignorecase)
+        best = max(best, run, key=len)
+
+    walk(parsed, bool(parsed.state.flags & re.IGNORECASE))
+    return best or None
+
+
+def _max_match_len(source: str) -> int:
+    """The longest match the pattern can produce, capped at OVERLAP.
+
+    Unbounded repeats (``*``, ``+``) make the width unbounded, so such
+    patterns get the full OVERLAP.
+    """
+    try:
+        return min(sre_parser.parse(source).getwidth()[1], OVERLAP)
+    except re.error:
+        return OVERLAP
+
+
+def _min_match_len(source: str) -> int:
+    """The shortest match the pattern can produce."""
+    try:
+        return sre_parser.parse(source).getwidth()[0]
+    except re.error:
+        return 0
+
+
+def _has_nested_unbounded_repeat(source: str) -> bool:
+    """Whether an unbounded repeat contains another one, e.g. ``(a+)+``.
+
+    Such patterns can backtrack catastrophically (exponential time) in
+    the ``re`` engine on a crafted, nearly-matching input.
+    """
+    repeats = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+    def walk(items, inside_unbounded: bool) -> bool:
+        for op, av in items:
+            if op in repeats:
+                unbounded = av[1] == sre_constants.MAXREPEAT
+                if unbounded and inside_unbounded:
+                    return True
+                if walk(av[2], inside_unbounded or unbounded):
+                    return True
+            elif op is sre_constants.SUBPATTERN:
+                if walk(av[3], inside_unbounded):
+                    return True
+            elif op is sre_constants.BRANCH:
+                if any(walk(branch, inside_unbounded) for branch in av[1]):
+                    return True
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                if walk(av[1], inside_unbounded):
+                    return True
+        return False
+
+    try:
+        return walk(sre_parser.parse(source), False)
+    except re.error:
+        return False
+
+
+def _compile_bytes(source: str) -> re.Pattern | None:
+    """Compile a pattern source for matching raw bytes, if it is plain ASCII.
+
+    In bytes mode \\w, \\d, \\s and \\b are ASCII-only -- the same classes
+    gitleaks' (RE2) rules are written against.
+    """
+    if not source.isascii():
+        return None
+    try:
+        return re.compile(source.encode('ascii'))
+    except re.error:
+        return None
+
+
+@dataclass(slots=True, frozen=True)
 class Pattern:
-    """A compiled detection pattern."""
+    """A compiled detection pattern (shared between scrubbers, so immutable)."""
     id: str
     description: str
     regex: re.Pattern
     category: str  # 'SECRET' or 'PII'
     placeholder: str
     exemptions: list[re.Pattern] = field(default_factory=list)
+    regex_bytes: re.Pattern | None = None  # same pattern for scrub_bytes()
+    anchor: str | None = None  # literal every match contains; no match without it
+    max_len: int = OVERLAP  # longest possible match, capped at OVERLAP
+    min_len: int = 0  # shortest possible match; shorter text can't match
 
 
-@dataclass
+@dataclass(slots=True)
 class Finding:
     """A detected secret or PII instance."""
     pattern_id: str
@@ -42,10 +184,10 @@ class Finding:
     placeholder: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrubResult:
     """Result of scrubbing text."""
-    text: str
+    text: str  # bytes only internally, on the way to scrub_bytes()
     findings: list[Finding] = field(default_factory=list)
 
     @property
@@ -53,6 +195,130 @@ class ScrubResult:
         return len(self.findings) > 0
 
 
+@functools.lru_cache(maxsize=8)
+def _load_gitleaks_config(config_path: str, mtime_ns: int) -> tuple[tuple[Pattern, ...], tuple[str, ...]]:
+    """Compile secret patterns from gitleaks.toml.
+
+    Cached per (path, mtime), so every scrubber built from the same config
+    file version shares one set of compiled patterns.
+
+    Returns:
+        Tuple of (patterns, warnings about rules that couldn't be loaded)
+    """
+    patterns: list[Pattern] = []
+    warnings: list[str] = []
+
+    try:
+        with open(config_path, 'rb') as f:
+            config = tomllib.load(f)
+    except Exception as e:
+        warnings.append(f"Failed to load config: {e}")
+        return (), tuple(warnings)
+
+    rules = config.get('rules', [])
+    if not rules:
+        warnings.append("No rules found in config file")
+        return (), tuple(warnings)
+
+    for rule in rules:
+        rule_id = rule.get('id', 'unknown')
+        try:
+            compiled = re.compile(rule['regex'])
+        except re.error as e:
+            warnings.append(f"Rule '{rule_id}': Invalid regex - {e}")
+            continue
+        except KeyError:
+            warnings.append(f"Rule '{rule_id}': Missing 'regex' field")
+            continue
+
+        # gitleaks rules are written for RE2 (Go's regexp), which also runs
+        # in linear time; only the backtracking re engine is at risk
+        regex = _prefer_re2(compiled)
+        if regex is compiled and _has_nested_unbounded_repeat(compiled.pattern):
+            # Kept: the check is a heuristic, and dropping a detector would
+            # let its secrets through
+            warnings.append(
+                f"Rule '{rule_id}': Nested unbounded repeat - may backtrack catastrophically "
+                "(install the 're2' extra to match it in linear time)"
+            )
+
+        regex_bytes = _compile_bytes(compiled.pattern)
+        if regex_bytes is not None:
+            regex_bytes = _prefer_re2(regex_bytes)
+
+        placeholder_name = rule_id.upper().replace('-', '_')
+        patterns.append(Pattern(
+            id=rule_id,
+            description=rule.get('description', ''),
+            regex=regex,
+            category='SECRET',
+            placeholder=f'[REDACTED_{placeholder_name}]',
+            regex_bytes=regex_bytes,
+            anchor=_required_literal(compiled.pattern),
+            max_len=_max_match_len(compiled.pattern),
+            min_len=_min_match_len(compiled.pattern),
+        ))
+
+    if len(patterns) == 0 and len(rules) > 0:
+        warnings.append("All patterns failed to compile - no secrets will be scrubbed!")
+
+    return tuple(patterns), tuple(warnings)
+
+
+# Email domains that are obviously fictional/test data and should not be scrubbed.
+# Covers RFC 2606 reserved names plus common test conventions.
+_EMAIL_EXEMPT = re.compile(
+    r'@(?:example\.(?:com|org|net|edu)|test\.(?:com|org|net)|localhost|invalid)$',
+    re.IGNORECASE,
+)
+
+# SSNs that can never be issued: area 000, 666 or 9xx, group 00, serial
+# 0000. Checked after matching rather than with lookaheads in the pattern
+# itself, so the pattern stays RE2-compatible.
+_SSN_EXEMPT = re.compile(r'^(?:000|666|9\d\d)|^\d{3}-00|0000$')
+
+
+def _compile_pii_patterns() -> tuple[Pattern, ...]:
+    """Compile the built-in PII detection patterns."""
+    pii_defs = [
+        ('email', 'Email Address',
+         r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b',
+         [_EMAIL_EXEMPT]),
+        ('credit_card', 'Credit Card Number',
+         r'\b(?:4[0-9]{12}(?:[0-9]{3})?|5[1-5][0-9]{14}|3[47][0-9]{13}|6(?:011|5[0-9]{2})[0-9]{12})\b',
+         []),
+        ('us_ssn', 'US Social Security Number',
+         r'\b\d{3}-\d{2}-\d{4}\b',
+         [_SSN_EXEMPT]),
+        ('phone_us', 'US Phone Number',
+         r'\b(?:\+?1[-.\s]?)?(?:\(?[2-9]\d{2}\)?[-.\s]?)[2-9]\d{2}[-.\s]?\d{4}\b',
+         []),
+        ('ipv4_private', 'Private IPv4 Address',
+         r'\b(?:10\.\d{1,3}\.\d{1,3}\.\d{1,3}|172\.(?:1[6-9]|2\d|3[01])\.\d{1,3}\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3})\b',
+         []),
+    ]
+
+    return tuple(
+        Pattern(
+            id=pattern_id,
+            description=description,
+            regex=re.compile(regex_str),
+            category='PII',
+            placeholder=f'[REDACTED_{pattern_id.upper()}]',
+            exemptions=exemptions,
+            regex_bytes=_compile_bytes(regex_str),
+            anchor=_required_literal(regex_str),
+            max_len=_max_match_len(regex_str),
+            min_len=_min_match_len(regex_str),
+        )
+        for pattern_id, description, regex_str, exemptions in pii_defs
+    )
+
+
+# Built-in PII patterns never change, so compile them once at import
+_PII_PATTERNS = _compile_pii_patterns()
+
+
 class DLPScrubber:
     """Scrubs secrets and PII from text using regex patterns."""
 
@@ -64,155 +330,226 @@ class DLPScrubber:
         if gitleaks_config:
             self._load_gitleaks_patterns(gitleaks_config)
         self._load_pii_patterns()
+        self._all_patterns = tuple(self.secret_patterns + self.pii_patterns)
+        self._word_gate, self._word_gate_bytes, self._gated = self._compile_word_gate()
+        # A chunk's overlap only has to fit the longest possible match
+        # (individual patterns scan only as far past it as they need)
+        self._overlap = max((p.max_len for p in self._all_patterns), default=0)
+        # Text shorter than every pattern's shortest match can't contain one
+        self._min_len = min((p.min_len for p in self._all_patterns), default=0)
 
         if self.warnings:
             print(f"WARNING: DLP scrubber had {len(self.warnings)} issue(s):", file=sys.stderr)
             for warning in self.warnings:
                 print(f"  - {warning}", file=sys.stderr)
 
-    def _load_gitleaks_patterns(self, config_path: str) -> None:
-        """Load secret patterns from gitleaks.toml."""
-        path = Path(config_path)
-        if not path.exists():
-            self.warnings.append(f"Config file not found: {config_path}")
-            return
+    @classmethod
+    def get(cls, gitleaks_config: str | None = None) -> 'DLPScrubber':
+        """Return a shared scrubber for gitleaks_config.
 
-        try:
-            with open(path, 'rb') as f:
-                config = tomllib.load(f)
-        except Exception as e:
-            self.warnings.append(f"Failed to load config: {e}")
-            return
+        Instances are cached per config file version (path + mtime), so
+        repeated callers reuse the compiled patterns and an edited config
+        still takes effect.
+        """
+        mtime_ns = None
+        if gitleaks_config:
+            try:
+                mtime_ns = Path(gitleaks_config).stat().st_mtime_ns
+            except OSError:
+                pass
+        return _shared_scrubber(gitleaks_config, mtime_ns)
 
-        rules = config.get('rules', [])
-        if not rules:
-            self.warnings.append("No rules found in config file")
+    def _load_gitleaks_patterns(self, config_path: str) -> None:
+        """Load secret patterns from gitleaks.toml (parsed once per file version)."""
+        try:
+            mtime_ns = Path(config_path).stat().st_mtime_ns
+        except OSError:
+            self.warnings.append(f"Config file not found: {config_path}")
             return
 
-        for rule in rules:
-            rule_id = rule.get('id', 'unknown')
-            try:
-                compiled = re.compile(rule['regex'])
-            except re.error as e:
-                self.warnings.append(f"Rule '{rule_id}': Invalid regex - {e}")
-                continue
-            except KeyError:
-                self.warnings.append(f"Rule '{rule_id}': Missing 'regex' field")
-                continue
-
-            placeholder_name = rule_id.upper().replace('-', '_')
-            self.secret_patterns.append(Pattern(
-                id=rule_id,
-                description=rule.get('description', ''),
-                regex=compiled,
-                category='SECRET',
-                placeholder=f'[REDACTED_{placeholder_name}]',
-            ))
-
-        if len(self.secret_patterns) == 0 and len(rules) > 0:
-            self.warnings.append("All patterns failed to compile - no secrets will be scrubbed!")
-
-    # Email domains that are obviously fictional/test data and should not be scrubbed.
-    # Covers RFC 2606 reserved names plus common test conventions.
-    _EMAIL_EXEMPT = re.compile(
-        r'@(?:example\.(?:com|org|net|edu)|test\.(?:com|org|net)|localhost|invalid)$',
-        re.IGNORECASE,
-    )
+        patterns, warnings = _load_gitleaks_config(config_path, mtime_ns)
+        self.secret_patterns.extend(patterns)
+        self.warnings.extend(warnings)
 
     def _load_pii_patterns(self) -> None:
         """Load built-in PII detection patterns."""
-        pii_defs = [
-            ('email', 'Email Address',
-             r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b',
-             [self._EMAIL_EXEMPT]),
-            ('credit_card', 'Credit Card Number',
-             r'\b(?:4[0-9]{12}(?:[0-9]{3})?|5[1-5][0-9]{14}|3[47][0-9]{13}|6(?:011|5[0-9]{2})[0-9]{12})\b',
-             []),
-            ('us_ssn', 'US Social Security Number',
-             r'\b(?!000|666|9\d{2})\d{3}-(?!00)\d{2}-(?!0000)\d{4}\b',
-             []),
-            ('phone_us', 'US Phone Number',
-             r'\b(?:\+?1[-.\s]?)?(?:\(?[2-9]\d{2}\)?[-.\s]?)[2-9]\d{2}[-.\s]?\d{4}\b',
-             []),
-            ('ipv4_private', 'Private IPv4 Address',
-             r'\b(?:10\.\d{1,3}\.\d{1,3}\.\d{1,3}|172\.(?:1[6-9]|2\d|3[01])\.\d{1,3}\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3})\b',
-             []),
-        ]
+        self.pii_patterns.extend(_PII_PATTERNS)
 
-        for pattern_id, description, regex_str, exemptions in pii_defs:
-            self.pii_patterns.append(Pattern(
-                id=pattern_id,
-                description=description,
-                regex=re.compile(regex_str),
-                category='PII',
-                placeholder=f'[REDACTED_{pattern_id.upper()}]',
-                exemptions=exemptions,
-            ))
+    def _compile_word_gate(self) -> tuple[re.Pattern | None, re.Pattern | None, set[int]]:
+        """Combine the word-boundary-anchored patterns into one alternation.
 
-    def scrub(self, text: str) -> ScrubResult:
-        """Scrub secrets and PII from text.
+        Patterns that begin with ``\\b`` have no literal prefix for the regex
+        engine to skip ahead to, so each one is tried at every position of
+        the text; as a single alternation they are tried together in one
+        pass, which is markedly faster. Patterns with a literal prefix (or
+        inline flags) are quicker to scan on their own and are left out.
+
+        A search with the alternation finds the leftmost position at which
+        any of these patterns matches -- so their individual scans can start
+        there, or be skipped when it finds nothing. Its own matches can't
+        replace theirs: the first alternative to match would hide overlapping
+        matches of the others.
 
-        Finds all matches, replaces right-to-left to preserve positions,
-        and returns scrubbed text with audit trail of findings.
+        Returns:
+            The compiled alternation (None if there is nothing to combine or
+            a pattern uses backreferences or clashing group names), its bytes
+            counterpart, and the id()s of the patterns it covers.
         """
-        if not text:
-            return ScrubResult(text=text)
+        gated = [
+            p for p in self._all_patterns
+            if p.regex.pattern.startswith('\\b') and not _BACKREFERENCE.search(p.regex.pattern)
+        ]
+        if not gated:
+            return None, None, set()
 
-        # Process in chunks for large files
-        if len(text) > MAX_SCRUB_SIZE:
-            return self._scrub_large_text(text)
+        source = '|'.join(f'(?:{p.regex.pattern})' for p in gated)
+        try:
+            gate = re.compile(source)
+        except re.error:
+            return None, None, set()
+        return gate, _compile_bytes(source), {id(p) for p in gated}
+
+    def _find_matches(
+        self, text: str | bytes, pos: int = 0, endpos: int | None = None,
+    ) -> list[tuple[int, int, str, Pattern]]:
+        """Find non-exempt matches of every pattern starting in text[pos:endpos].
+
+        The window is scanned in place (as with ``re.Pattern.finditer``'s
+        pos/endpos), so positions are relative to the whole text. Each
+        pattern's scan runs on past endpos by its max_len, so that a match
+        starting in the window can run to completion; callers drop any match
+        that starts past endpos. Bytes are matched with each pattern's
+        regex_bytes; the matched text is still returned decoded to str.
+
+        Returns:
+            (start, end, matched_text, pattern) tuples -- the caller builds
+            Findings only for the matches that survive overlap filtering.
+        """
+        if endpos is None:
+            endpos = len(text)
+        as_bytes = isinstance(text, bytes)
+        word_gate = self._word_gate_bytes if as_bytes else self._word_gate
+
+        # None of the gated patterns can match before the gate's first match
+        gated_start = pos
+        if word_gate is not None:
+            first = word_gate.search(text, pos, endpos + self._overlap)
+            gated_start = first.start() if first else None
+
+        all_matches: list[tuple[int, int, str, Pattern]] = []
+        append = all_matches.append
+
+        for pattern in self._all_patterns:
+            start_pos = pos
+            if id(pattern) in self._gated:
+                if gated_start is None:
+                    continue
+                start_pos = gated_start
+            scan_end = endpos + pattern.max_len
+            if min(scan_end, len(text)) - start_pos < pattern.min_len:
+                continue
 
-        # Collect all matches across all patterns
-        all_matches: list[tuple[int, int, Finding, Pattern]] = []
+            # A plain substring search is far cheaper than a regex scan, and
+            # most bodies lack most anchors
+            if pattern.anchor is not None:
+                anchor = pattern.anchor.encode('utf-8') if as_bytes else pattern.anchor
+                if text.find(anchor, start_pos, scan_end) < 0:
+                    continue
 
-        for pattern in self.secret_patterns + self.pii_patterns:
-            for match in pattern.regex.finditer(text):
+            regex = pattern.regex_bytes if as_bytes else pattern.regex
+            exemptions = pattern.exemptions
+            has_groups = regex.groups > 0
+            for match in regex.finditer(text, start_pos, scan_end):
                 # Use first capturing group if present, else full match
-                if match.lastindex:
+                if has_groups and match.lastindex:
                     start, end = match.start(1), match.end(1)
                     matched_text = match.group(1)
                 else:
-                    start, end = match.start(), match.end()
+                    start, end = match.span()
                     matched_text = match.group()
+                if as_bytes:
+                    matched_text = matched_text.decode('utf-8', errors='replace')
 
-                if any(ex.search(matched_text) for ex in pattern.exemptions):
+                if exemptions and any(ex.search(matched_text) for ex in exemptions):
                     continue
 
-                finding = Finding(
-                    pattern_id=pattern.id,
-                    category=pattern.category,
-                    matched_text=matched_text,
-                    start=start,
-                    end=end,
-                    placeholder=pattern.placeholder,
-                )
-                all_matches.append((start, end, finding, pattern))
+                append((start, end, matched_text, pattern))
+
+        return all_matches
+
+    def scrub(self, text: str) -> ScrubResult:
+        """Scrub secrets and PII from text.
+
+        Finds all matches, drops overlaps (keeping the rightmost), replaces
+        them in one left-to-right pass, and returns scrubbed text with audit
+        trail of findings.
+        """
+        return self._scrub(text)
+
+    def scrub_bytes(self, content: bytes) -> tuple[bytes, list[Finding]]:
+        """Scrub secrets and PII from raw bytes (e.g. a UTF-8 HTTP body).
+
+        Matches directly against the bytes, so a body doesn't have to be
+        decoded and re-encoded around the scrub -- and bodies that aren't
+        valid UTF-8 still get scrubbed. Finding positions are byte offsets.
+
+        If some pattern has no bytes form (non-ASCII source), falls back to
+        decoding as UTF-8 and scrub(); undecodable content is then returned
+        unchanged.
 
+        Returns:
+            Tuple of (possibly-scrubbed content, list of findings)
+        """
+        if any(p.regex_bytes is None for p in self._all_patterns):
+            try:
+                result = self.scrub(content.decode('utf-8'))
+            except UnicodeDecodeError:
+                return content, []
+            if not result.was_scrubbed:
+                return content, []
+            return result.text.encode('utf-8'), result.findings
+
+        result = self._scrub(content)
+        return result.text, result.findings
+
+    def _scrub(self, text: str | bytes) -> ScrubResult:
+        """scrub() for str or bytes; the result's text has the input's type."""
+        if not text or len(text) < self._min_len:
+            return ScrubResult(text=text)
+
+        # Collect all matches across all patterns, in chunks for large files
+        if len(text) > MAX_SCRUB_SIZE:
+            all_matches = self._find_matches_in_chunks(text)
+        else:
+            all_matches = self._find_matches(text)
         if not all_matches:
             return ScrubResult(text=text)
 
         # Sort by start position descending (replace right-to-left)
-        all_matches.sort(key=lambda m: m[0], reverse=True)
+        all_matches.sort(key=operator.itemgetter(0), reverse=True)
 
         # Remove overlapping matches (keep rightmost non-overlapping)
-        filtered: list[tuple[int, int, Finding, Pattern]] = []
+        filtered: list[tuple[int, int, str, Pattern]] = []
         min_start = len(text)
-        for start, end, finding, pattern in all_matches:
-            if end <= min_start:
-                filtered.append((start, end, finding, pattern))
-                min_start = start
-
-        # Replace right-to-left
-        scrubbed = text
-        findings = []
-        for start, end, finding, pattern in filtered:
-            scrubbed = scrubbed[:start] + pattern.placeholder + scrubbed[end:]
-            findings.append(finding)
-
-        # Reverse findings so they're in left-to-right order
-        findings.reverse()
-
-        return ScrubResult(text=scrubbed, findings=findings)
+        for match in all_matches:
+            if match[1] <= min_start:
+                filtered.append(match)
+                min_start = match[0]
+
+        # Back to left-to-right order for a single-pass rebuild; Findings
+        # are only built for the matches that survived
+        findings = [
+            Finding(
+                pattern_id=pattern.id,
+                category=pattern.category,
+                matched_text=matched_text,
+                start=start,
+                end=end,
+                placeholder=pattern.placeholder,
+            )
+            for start, end, matched_text, pattern in reversed(filtered)
+        ]
+        return ScrubResult(text=self._replace_findings(text, findings), findings=findings)
 
     def scrub_json(self, text: str) -> ScrubResult:
         """Scrub PII/secrets from a JSON document, touching only string values.
@@ -260,95 +597,43 @@ class DLPScrubber:
             findings=findings,
         )
 
-    def _scrub_large_text(self, text: str) -> ScrubResult:
-        """Scrub large text by processing in chunks with overlap."""
-        all_findings: list[Finding] = []
+    def _find_matches_in_chunks(self, text: str | bytes) -> list[tuple[int, int, str, Pattern]]:
+        """Find matches in large text, one overlapping window at a time.
+
+        Each window is scanned in place rather than sliced out, and keeps
+        only the matches that start before the next window does -- the
+        overlap, sized per pattern, just lets those run to completion -- so
+        no match is reported twice.
+        """
+        all_matches: list[tuple[int, int, str, Pattern]] = []
         offset = 0
 
         while offset < len(text):
-            chunk = text[offset:offset + CHUNK_SIZE + OVERLAP]
-            result = self._scrub_chunk(chunk, offset)
-            all_findings.extend(result.findings)
-            offset += CHUNK_SIZE
-
-        # Deduplicate findings (secrets in overlapping chunks)
-        unique_findings = self._deduplicate_findings(all_findings)
-
-        if not unique_findings:
-            return ScrubResult(text=text)
-
-        # Sort findings by start position descending for replacement
-        unique_findings.sort(key=lambda f: f.start, reverse=True)
-
-        # Replace right-to-left to preserve positions
-        scrubbed = text
-        for finding in unique_findings:
-            scrubbed = (
-                scrubbed[:finding.start] +
-                finding.placeholder +
-                scrubbed[finding.end:]
-            )
+            owned_end = offset + CHUNK_SIZE
+            window = self._find_matches(text, offset, owned_end)
+            all_matches.extend(m for m in window if m[0] < owned_end)
+            offset = owned_end
 
-        # Reverse findings so they're in left-to-right order
-        unique_findings.reverse()
+        return all_matches
 
-        return ScrubResult(text=scrubbed, findings=unique_findings)
+    @staticmethod
+    def _replace_findings(text: str | bytes, findings: list[Finding]) -> str | bytes:
+        """Replace each finding's span with its placeholder, copying text once.
 
-    def _scrub_chunk(self, chunk: str, offset: int) -> ScrubResult:
-        """Scrub a single chunk and return findings with absolute positions."""
-        all_matches: list[tuple[int, int, Finding, Pattern]] = []
-
-        for pattern in self.secret_patterns + self.pii_patterns:
-            for match in pattern.regex.finditer(chunk):
-                if match.lastindex:
-                    start, end = match.start(1), match.end(1)
-                    matched_text = match.group(1)
-                else:
-                    start, end = match.start(), match.end()
-                    matched_text = match.group()
-
-                if any(ex.search(matched_text) for ex in pattern.exemptions):
-                    continue
-
-                finding = Finding(
-                    pattern_id=pattern.id,
-                    category=pattern.category,
-                    matched_text=matched_text,
-                    start=start + offset,
-                    end=end + offset,
-                    placeholder=pattern.placeholder,
-                )
-                all_matches.append((start + offset, end + offset, finding, pattern))
-
-        if not all_matches:
-            return ScrubResult(text=chunk)
-
-        # Sort, filter overlaps, replace (same logic as original scrub)
-        all_matches.sort(key=lambda m: m[0], reverse=True)
-
-        filtered: list[tuple[int, int, Finding, Pattern]] = []
-        min_start = len(chunk) + offset
-        for start, end, finding, pattern in all_matches:
-            if end <= min_start:
-                filtered.append((start, end, finding, pattern))
-                min_start = start
-
-        chunk_scrubbed = chunk
-        findings = []
-        for start, end, finding, pattern in filtered:
-            chunk_scrubbed = chunk_scrubbed[:start - offset] + pattern.placeholder + chunk_scrubbed[end - offset:]
-            findings.append(finding)
-
-        findings.reverse()
-        return ScrubResult(text=chunk_scrubbed, findings=findings)
-
-    def _deduplicate_findings(self, findings: list[Finding]) -> list[Finding]:
-        """Remove duplicate findings from overlapping chunks."""
-        seen = set()
-        unique = []
-        for f in findings:
-            key = (f.pattern_id, f.start, f.end)
-            if key not in seen:
-                seen.add(key)
-                unique.append(f)
-        return unique
+        Findings must be sorted by start and non-overlapping.
+        """
+        as_bytes = isinstance(text, bytes)
+        parts = []
+        cursor = 0
+        for finding in findings:
+            parts.append(text[cursor:finding.start])
+            parts.append(finding.placeholder.encode('utf-8') if as_bytes else finding.placeholder)
+            cursor = finding.end
+        parts.append(text[cursor:])
+        return (b'' if as_bytes else '').join(parts)
+
+
+@functools.lru_cache(maxsize=4)
+def _shared_scrubber(gitleaks_config: str | None, mtime_ns: int | None) -> DLPScrubber:
+    """Backs DLPScrubber.get(); mtime_ns is only part of the cache key."""
+    return DLPScrubber(gitleaks_config=gitleaks_config)
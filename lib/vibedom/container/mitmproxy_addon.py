@@ -1,10 +1,14 @@
 """Mitmproxy addon for enforcing whitelist and DLP scrubbing."""
 
+import asyncio
+import collections
 import datetime
+import functools
 import json
 import os
 import signal
 import sys
+import threading
 from pathlib import Path
 
 try:
@@ -34,6 +38,52 @@ SCRUBBABLE_CONTENT_TYPES = (
     'application/javascript',
 )
 
+# Response to requests for non-whitelisted domains. Response.make() copies
+# the headers, so these are shared by every blocked flow
+BLOCKED_STATUS = 403
+BLOCKED_BODY = b"Domain not whitelisted by vibedom"
+BLOCKED_HEADERS = {"Content-Type": "text/plain"}
+
+# Network log entries are written out in batches, this often (seconds)...
+LOG_FLUSH_INTERVAL = 0.05
+# ...or, when no flusher task is running, as soon as this many are pending
+LOG_FLUSH_THRESHOLD = 1024
+# Entries are never dropped, but warn if this many pile up unwritten
+LOG_BUFFER_HIGH_WATER = 100_000
+
+# How often to check the whitelist file for changes (seconds)
+WHITELIST_POLL_INTERVAL = 1.0
+
+# Only bodies up to this size (bytes) go through the scrub cache: small
+# bodies are the ones clients re-send, and large ones (LLM conversations)
+# rarely repeat and would pin unscrubbed secrets in memory. They're also
+# cheap enough to scrub inline; larger ones are scrubbed in a worker thread
+SCRUB_CACHE_MAX_BODY = 4096
+
+
+def _log_line(entry: dict) -> bytes:
+    """Serialize a network log entry as one JSON line.
+
+    Same format as Session.log_network_request(), which appends to the
+    same file.
+    """
+    return (json.dumps(entry) + '\n').encode('utf-8')
+
+
+# Marks a whitelisted domain's node in the suffix trie
+_WHITELISTED = object()
+
+
+def _build_suffix_trie(domains: frozenset) -> dict:
+    """Index domains by reversed label, e.g. 'api.github.com' as com -> github -> api."""
+    trie: dict = {}
+    for domain in domains:
+        node = trie
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        node[_WHITELISTED] = True
+    return trie
+
 
 class VibedomProxy:
     """Mitmproxy addon for vibedom sandbox."""
@@ -46,6 +96,30 @@ class VibedomProxy:
         )
         self.network_log_path = Path(network_log)
         self.network_log_path.parent.mkdir(parents=True, exist_ok=True)
+        # Opened on first write and kept open; entries are buffered and
+        # written in batches, from a worker thread while mitmproxy runs
+        self._network_log_fd: int | None = None
+        self._network_log_lock = threading.Lock()
+        self._log_buffer: list[dict] = []
+        self._log_flusher = None
+        # Cleared while the flusher has a batch in a worker thread, so done()
+        # can wait for it before the final flush and close
+        self._log_write_idle = threading.Event()
+        self._log_write_idle.set()
+        self._whitelist_watcher = None
+        # Log only every Nth allowed, unscrubbed request to each host, starting
+        # with its first (1 = log all); blocked and scrubbed requests are
+        # always logged
+        log_sample = os.environ.get('VIBEDOM_LOG_SAMPLE', '1')
+        try:
+            self._log_sample_n = max(1, int(log_sample))
+        except ValueError:
+            print(
+                f"Warning: Invalid VIBEDOM_LOG_SAMPLE {log_sample!r}, logging all requests",
+                file=sys.stderr
+            )
+            self._log_sample_n = 1
+        self._allowed_per_host: collections.Counter[str] = collections.Counter()
 
         # Initialize DLP scrubber
         gitleaks_config = os.environ.get(
@@ -53,22 +127,49 @@ class VibedomProxy:
             str(Path(__file__).parent / 'gitleaks.toml')
         )
         config_path = gitleaks_config if Path(gitleaks_config).exists() else None
-        self.scrubber = DLPScrubber(gitleaks_config=config_path)
+        self.scrubber = DLPScrubber.get(config_path)
+        # Clients re-send identical small bodies (retries, repeated payloads),
+        # so remember the last few results; bytes cache their own hash
+        self._scrub_body_cached = functools.lru_cache(maxsize=32)(self._scrub_body_uncached)
 
         # Register SIGHUP handler for whitelist reload
         signal.signal(signal.SIGHUP, self._reload_whitelist)
 
-    def load_whitelist(self) -> set:
+    @property
+    def whitelist(self) -> frozenset:
+        """Whitelisted domains (lowercase); immutable, so the trie built from them stays in sync."""
+        return self._whitelist
+
+    @whitelist.setter
+    def whitelist(self, domains: frozenset) -> None:
+        self._whitelist = domains
+        self._whitelist_trie = _build_suffix_trie(domains)
+        # A fresh cache per whitelist, so a reload never serves stale verdicts
+        self._allowed_cache = functools.lru_cache(maxsize=4096)(self._in_whitelist)
+
+    @staticmethod
+    def _whitelist_path() -> Path:
+        return Path(os.environ.get('VIBEDOM_WHITELIST_PATH', '/mnt/config/trusted_domains.txt'))
+
+    @staticmethod
+    def _mtime_ns(path: Path) -> int | None:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def load_whitelist(self) -> frozenset:
         """Load whitelist from mounted config."""
-        whitelist_path = Path(
-            os.environ.get('VIBEDOM_WHITELIST_PATH', '/mnt/config/trusted_domains.txt')
-        )
+        whitelist_path = self._whitelist_path()
+        # Recorded before reading, so an edit made mid-read is picked up
+        # by the next poll
+        self._whitelist_mtime_ns = self._mtime_ns(whitelist_path)
         if not whitelist_path.exists():
             print(
                 f"WARNING: Whitelist file not found at {whitelist_path}, blocking all traffic",
                 file=sys.stderr
             )
-            return set()
+            return frozenset()
 
         domains = set()
         with open(whitelist_path) as f:
@@ -76,24 +177,38 @@ class VibedomProxy:
                 line = line.strip()
                 if line and not line.startswith('#'):
                     domains.add(line.lower())
-        return domains
+        return frozenset(domains)
 
     def _reload_whitelist(self, signum, frame):
         """Reload whitelist when SIGHUP received."""
         self.whitelist = self.load_whitelist()
         print(f"Reloaded whitelist: {len(self.whitelist)} domains", file=sys.stderr)
 
-    def is_allowed(self, domain: str) -> bool:
-        """Check if domain is whitelisted."""
-        domain = domain.lower()
+    def _reload_whitelist_if_changed(self) -> None:
+        """Reload the whitelist if its file was modified (or created/removed)."""
+        if self._mtime_ns(self._whitelist_path()) != self._whitelist_mtime_ns:
+            self._reload_whitelist(None, None)
 
-        if domain in self.whitelist:
-            return True
+    async def _watch_whitelist(self) -> None:
+        """Poll the whitelist file every WHITELIST_POLL_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(WHITELIST_POLL_INTERVAL)
+            self._reload_whitelist_if_changed()
 
-        parts = domain.split('.')
-        for i in range(len(parts)):
-            parent = '.'.join(parts[i:])
-            if parent in self.whitelist:
+    def is_allowed(self, domain: str) -> bool:
+        """Check if domain is whitelisted (memoized; traffic repeats domains)."""
+        return self._allowed_cache(domain.lower())
+
+    def _in_whitelist(self, domain: str) -> bool:
+        """Uncached is_allowed for a lowercase domain."""
+        # Walk the trie from the TLD down: the domain is allowed as soon as
+        # a whitelisted suffix (or the domain itself) is reached
+        node = self._whitelist_trie
+        for label in reversed(domain.split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _WHITELISTED in node:
                 return True
 
         return False
@@ -113,15 +228,26 @@ class VibedomProxy:
         if not content or not self._is_scrubbable(content_type):
             return content, []
 
+        if len(content) > SCRUB_CACHE_MAX_BODY:
+            scrubbed, findings = self._scrub_body_uncached(content, content_type)
+        else:
+            scrubbed, findings = self._scrub_body_cached(content, content_type)
+        return scrubbed, list(findings)
+
+    def _scrub_body_uncached(self, content: bytes, content_type: str) -> tuple[bytes, tuple]:
+        """Uncached _scrub_body for a non-empty, scrubbable body."""
         try:
             text = content.decode('utf-8')
         except UnicodeDecodeError:
-            return content, []
+            # Not text we can decode, but still worth scrubbing: match the
+            # raw bytes (where \d, \w and \b are ASCII-only)
+            scrubbed, findings = self.scrubber.scrub_bytes(content)
+            return scrubbed, tuple(findings)
 
         # For JSON bodies, scrub structure-aware so a numeric PII pattern can
         # never corrupt the document (e.g. a bare number in value position).
         # Fall back to raw-text scrubbing if the body isn't actually valid JSON.
-        if content_type and content_type.startswith('application/json'):
+        if content_type.startswith('application/json'):
             try:
                 result = self.scrubber.scrub_json(text)
             except json.JSONDecodeError:
@@ -130,8 +256,8 @@ class VibedomProxy:
             result = self.scrubber.scrub(text)
 
         if result.was_scrubbed:
-            return result.text.encode('utf-8'), result.findings
-        return content, []
+            return result.text.encode('utf-8'), tuple(result.findings)
+        return content, ()
 
     def _scrub_url(self, url: str) -> tuple[str, list]:
         """Scrub secrets from URL query parameters.
@@ -175,59 +301,157 @@ class VibedomProxy:
             for f in findings
         ]
 
-    def request(self, flow: http.HTTPFlow) -> None:
+    async def request(self, flow: http.HTTPFlow) -> None:
         """Intercept, scrub, and filter requests."""
-        domain = flow.request.host_header or flow.request.host
+        domain = (flow.request.host_header or flow.request.host or '').lower()
 
         scrubbed_findings = []
 
         # Scrub URL query parameters
-        url_scrubbed, url_findings = self._scrub_url(flow.request.pretty_url)
-        if url_scrubbed != flow.request.pretty_url:
-            flow.request.url = url_scrubbed
+        # pretty_url is rebuilt on every access, so read it once
+        url = flow.request.pretty_url
+        url_scrubbed, url_findings = self._scrub_url(url)
+        if url_scrubbed != url:
+            flow.request.url = url = url_scrubbed
             scrubbed_findings.extend(url_findings)
 
         # Scrub request body before forwarding
-        if flow.request.content:
+        content = flow.request.content
+        if content:
             content_type = flow.request.headers.get('Content-Type', '')
-            scrubbed_content, findings = self._scrub_body(
-                flow.request.content, content_type
-            )
+            if len(content) > SCRUB_CACHE_MAX_BODY:
+                # Scrubbing is CPU-bound; run it in a worker thread so a large
+                # body doesn't stall every other flow on the event loop
+                scrubbed_content, findings = await asyncio.to_thread(
+                    self._scrub_body, content, content_type
+                )
+            else:
+                # Not worth a thread-pool hop
+                scrubbed_content, findings = self._scrub_body(content, content_type)
             if findings:
                 flow.request.content = scrubbed_content
                 scrubbed_findings.extend(findings)
 
         # Log request (with scrubbing info)
-        self.log_request(flow, allowed=self.is_allowed(domain),
-                         scrubbed=scrubbed_findings)
+        allowed = self._allowed_cache(domain)  # domain is already lowercase
+        self.log_request(flow, allowed=allowed, scrubbed=scrubbed_findings, host=domain, url=url)
 
         # Block if not whitelisted
-        if not self.is_allowed(domain):
-            flow.response = http.Response.make(
-                403,
-                b"Domain not whitelisted by vibedom",
-                {"Content-Type": "text/plain"}
-            )
+        if not allowed:
+            flow.response = http.Response.make(BLOCKED_STATUS, BLOCKED_BODY, BLOCKED_HEADERS)
 
     def log_request(self, flow: http.HTTPFlow, allowed: bool,
-                    scrubbed: list | None = None) -> None:
-        """Log network request with optional scrubbing details."""
+                    scrubbed: list | None = None, host: str | None = None,
+                    url: str | None = None) -> None:
+        """Log network request with optional scrubbing details.
+
+        host defaults to the flow's Host header (or its target host), url
+        to the flow's pretty_url.
+        """
+        host = host or flow.request.host_header or flow.request.host
+        if allowed and not scrubbed and self._log_sample_n > 1:
+            seen = self._allowed_per_host[host]
+            self._allowed_per_host[host] = seen + 1
+            if seen % self._log_sample_n:
+                return
+
         entry = {
             'timestamp': datetime.datetime.now(datetime.UTC).isoformat(),
             'method': flow.request.method,
-            'url': flow.request.pretty_url,
-            'host': flow.request.host_header or flow.request.host,
+            'url': url or flow.request.pretty_url,
+            'host': host,
             'allowed': allowed,
         }
 
         if scrubbed:
             entry['scrubbed'] = self._format_findings(scrubbed)
 
+        # Only buffer here; serializing and writing happen off the request
+        # path
+        self._log_buffer.append(entry)
+        pending = len(self._log_buffer)
+        if pending == LOG_BUFFER_HIGH_WATER:
+            print(f"Warning: {pending} network log entries waiting to be written", file=sys.stderr)
+        if pending >= LOG_FLUSH_THRESHOLD and self._log_flusher is None:
+            self._flush_log()
+
+    def _flush_log(self) -> None:
+        """Write all buffered network log entries now, in one write."""
+        batch, self._log_buffer = self._log_buffer, []
+        self._write_log_batch(batch)
+
+    def _write_log_batch(self, batch: list[dict]) -> None:
+        """Serialize entries and append them to the network log (thread-safe)."""
+        if not batch:
+            return
+        lines = []
+        for entry in batch:
+            try:
+                lines.append(_log_line(entry))
+            except (TypeError, ValueError) as e:
+                print(f"Warning: Failed to serialize network log entry: {e}", file=sys.stderr)
+        data = b''.join(lines)
+
+        with self._network_log_lock:
+            try:
+                if self._network_log_fd is None:
+                    self._network_log_fd = os.open(
+                        self.network_log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+                    )
+                # Batches are already whole, so write straight to the fd
+                # rather than through a buffered file object
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self._network_log_fd, view):]
+            except OSError as e:
+                print(f"Warning: Failed to log {len(batch)} request(s): {e}", file=sys.stderr)
+
+    async def _flush_log_periodically(self) -> None:
+        """Every LOG_FLUSH_INTERVAL seconds, write the buffered entries in a worker thread."""
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            if self._log_buffer:
+                batch, self._log_buffer = self._log_buffer, []
+                # The event loop never waits on the disk. Once handed to the
+                # thread the write runs to completion even if this task is
+                # cancelled, so done() waits on _log_write_idle instead
+                self._log_write_idle.clear()
+                try:
+                    await asyncio.to_thread(self._write_log_batch_in_worker, batch)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Keep flushing; a dead flusher would leave the buffer
+                    # growing with no threshold flush to take over
+                    print(f"Warning: Failed to log {len(batch)} request(s): {e}", file=sys.stderr)
+
+    def _write_log_batch_in_worker(self, batch: list[dict]) -> None:
+        """_write_log_batch for the flusher's worker thread; marks the write finished."""
         try:
-            with open(self.network_log_path, 'a') as f:
-                f.write(json.dumps(entry) + '\n')
-        except OSError as e:
-            print(f"Warning: Failed to log request: {e}", file=sys.stderr)
+            self._write_log_batch(batch)
+        finally:
+            self._log_write_idle.set()
+
+    def running(self) -> None:
+        """Start the background tasks once mitmproxy's event loop is up."""
+        loop = asyncio.get_running_loop()
+        self._log_flusher = loop.create_task(self._flush_log_periodically())
+        self._whitelist_watcher = loop.create_task(self._watch_whitelist())
+
+    def done(self) -> None:
+        """Stop the background tasks, then flush and close the network log."""
+        for task in (self._log_flusher, self._whitelist_watcher):
+            if task is not None:
+                task.cancel()
+        self._log_flusher = self._whitelist_watcher = None
+        # Let an in-flight batch land first, so lines stay in order and it
+        # can't reopen the log after the close below
+        self._log_write_idle.wait()
+        self._flush_log()
+        with self._network_log_lock:
+            if self._network_log_fd is not None:
+                os.close(self._network_log_fd)
+                self._network_log_fd = None
 
 
 addons = [VibedomProxy()]
@@ -3,10 +3,11 @@
 import json
 import subprocess
 from dataclasses import dataclass, asdict
+from functools import cached_property
 import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 
 @dataclass
@@ -41,10 +42,11 @@ class SessionState:
     ) -> 'SessionState':
         """Create a new SessionState for a fresh session."""
         from vibedom.words import generate_session_id
+        workspace_name = workspace.name
         if session_id is None:
-            session_id = generate_session_id(workspace.name)
+            session_id = generate_session_id(workspace_name)
         if container_name is None:
-            container_name = f'vibedom-{workspace.name}'
+            container_name = f'vibedom-{workspace_name}'
         return cls(
             session_id=session_id,
             workspace=str(workspace),
@@ -84,9 +86,9 @@ class SessionState:
         self.ended_at = datetime.now().isoformat(timespec='seconds')
         self.save(session_dir)
 
-    @property
+    @cached_property
     def started_at_dt(self) -> datetime:
-        """started_at as a datetime object."""
+        """started_at as a datetime object (parsed once per instance)."""
         return datetime.fromisoformat(self.started_at)
 
 
@@ -270,25 +272,31 @@ class SessionRegistry:
     def __init__(self, logs_dir: Path):
         self.logs_dir = logs_dir
 
-    def all(self) -> list['Session']:
-        """All sessions sorted newest first, skipping invalid directories."""
-        sessions = []
+    def _iter_sessions(self) -> Iterator['Session']:
+        """Load sessions newest first, skipping invalid directories."""
         for session_dir in sorted(self.logs_dir.glob('session-*'), reverse=True):
             if not session_dir.is_dir():
                 continue
             try:
-                sessions.append(Session.load(session_dir))
+                yield Session.load(session_dir)
             except (FileNotFoundError, ValueError, KeyError):
                 continue
-        return sessions
+
+    def all(self) -> list['Session']:
+        """All sessions sorted newest first, skipping invalid directories."""
+        return list(self._iter_sessions())
 
     def running(self) -> list['Session']:
         """Sessions with status 'running'."""
         return [s for s in self.all() if s.state.status == 'running']
 
     def find(self, id_or_name: str) -> Optional['Session']:
-        """Find session by session ID or workspace name (most recent match)."""
-        for session in self.all():
+        """Find session by session ID or workspace name (most recent match).
+
+        Scans newest first and stops at the first match, so older sessions
+        are never loaded.
+        """
+        for session in self._iter_sessions():
             if session.state.session_id == id_or_name:
                 return session
             if Path(session.state.workspace).name == id_or_name:
@@ -340,7 +348,11 @@ class SessionCleanup:
 
     @staticmethod
     def _filter_by_age(sessions: list['Session'], days: int) -> list['Session']:
-        """Return sessions older than N days."""
+        """Return sessions older than N days.
+
+        The cutoff is computed once up front; each session's ``started_at`` is
+        parsed at most once thanks to ``SessionState.started_at_dt`` caching.
+        """
         cutoff = datetime.now() - timedelta(days=days)
         return [s for s in sessions if s.state.started_at_dt < cutoff]
 
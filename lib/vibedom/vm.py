@@ -1,6 +1,8 @@
 """VM lifecycle management."""
 
+import functools
 import json
+import os
 import shutil
 import subprocess
 import sys
@@ -11,6 +13,17 @@ from typing import Optional
 from vibedom.proxy import ProxyManager
 
 
+@functools.lru_cache(maxsize=8)
+def _which(cmd: str, path_env: Optional[str]) -> Optional[str]:
+    """shutil.which(cmd), memoized per $PATH value.
+
+    Runtime detection runs several times per CLI invocation and each lookup
+    stats every $PATH entry. Keying on the current $PATH keeps the cache
+    correct if the environment changes.
+    """
+    return shutil.which(cmd)
+
+
 class VMManager:
     """Manages VM instances for sandbox sessions."""
 
@@ -101,19 +114,20 @@ class VMManager:
         Returns:
             Tuple of (runtime_name, command) — e.g. ('apple', 'container')
         """
+        path_env = os.environ.get('PATH')
         if runtime == 'docker':
-            if not shutil.which('docker'):
+            if not _which('docker', path_env):
                 raise RuntimeError("Docker runtime requested but not found on system.")
             return 'docker', 'docker'
         if runtime == 'apple':
-            if not shutil.which('container'):
+            if not _which('container', path_env):
                 raise RuntimeError("apple/container runtime requested but not found on system.")
             return 'apple', 'container'
 
         # Auto-detect: apple/container preferred (hardware VM isolation); Docker is fallback
-        if shutil.which('container'):
+        if _which('container', path_env):
             return 'apple', 'container'
-        if shutil.which('docker'):
+        if _which('docker', path_env):
             return 'docker', 'docker'
         raise RuntimeError(
             "No container runtime found. Install Docker or apple/container (experimental, macOS 26+)."
@@ -241,6 +255,39 @@ class VMManager:
         except FileNotFoundError:
             pass
 
+    # startup.sh touches this file once the clone/setup is done
+    READY_MARKER = '/tmp/.vm-ready'
+    READY_TIMEOUT = 60  # seconds (generous: first start may clone a large repo)
+    READY_POLL_INTERVAL = 0.25  # seconds
+
+    def _wait_until_ready(self) -> None:
+        """Poll until startup.sh has written the readiness marker.
+
+        Polls at a short interval against a deadline (like the proxy's
+        _wait_for_proxy) so start/restart return promptly once the container
+        is ready instead of rounding up to the next whole second.
+
+        Raises:
+            RuntimeError: If the marker doesn't appear within READY_TIMEOUT.
+        """
+        deadline = time.monotonic() + self.READY_TIMEOUT
+        while True:
+            result = subprocess.run(
+                [self.runtime_cmd, 'exec', self.container_name,
+                 'test', '-f', self.READY_MARKER],
+                capture_output=True,
+                check=False,
+            )
+            if result.returncode == 0:
+                return
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.READY_POLL_INTERVAL)
+        raise RuntimeError(
+            f"VM '{self.container_name}' failed to become ready within "
+            f"{self.READY_TIMEOUT} seconds"
+        )
+
     def restart(self) -> None:
         """Start a stopped container and wait for readiness."""
         try:
@@ -254,20 +301,7 @@ class VMManager:
                 f"Failed to restart container '{self.container_name}': {e}"
             ) from e
 
-        # Wait for VM to be ready
-        for _ in range(60):
-            result = subprocess.run(
-                [self.runtime_cmd, 'exec', self.container_name,
-                 'test', '-f', '/tmp/.vm-ready'],
-                capture_output=True,
-                check=False,
-            )
-            if result.returncode == 0:
-                return
-            time.sleep(1)
-        raise RuntimeError(
-            f"VM '{self.container_name}' failed to become ready within 60 seconds"
-        )
+        self._wait_until_ready()
 
     def start(self) -> None:
         """Start the VM with workspace mounted."""
@@ -437,20 +471,8 @@ class VMManager:
                 f"Container command '{self.runtime_cmd}' not found."
             ) from None
 
-        # Wait for VM to be ready (increased timeout for git cloning)
-        for _ in range(60):
-            result = subprocess.run(
-                [self.runtime_cmd, 'exec', self.container_name,
-                 'test', '-f', '/tmp/.vm-ready'],
-                capture_output=True,
-                check=False,
-            )
-            if result.returncode == 0:
-                return
-            time.sleep(1)
-        raise RuntimeError(
-            f"VM '{self.container_name}' failed to become ready within 60 seconds"
-        )
+        # Wait for VM to be ready (startup.sh may still be cloning the repo)
+        self._wait_until_ready()
 
     def stop(self) -> None:
         """Stop and remove the VM."""
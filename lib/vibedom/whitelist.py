@@ -19,15 +19,9 @@ def load_whitelist(whitelist_path: Path) -> Set[str]:
     if not whitelist_path.exists():
         return set()
 
-    domains = set()
-    with open(whitelist_path) as f:
-        for line in f:
-            line = line.strip()
-            # Skip comments and empty lines
-            if line and not line.startswith('#'):
-                domains.add(line.lower())
-
-    return domains
+    # Read in one go; skip comments and empty lines
+    lines = (line.strip() for line in whitelist_path.read_text().splitlines())
+    return {line.lower() for line in lines if line and not line.startswith('#')}
 
 def is_domain_allowed(domain: str, whitelist: Set[str]) -> bool:
     """Check if a domain is allowed.
@@ -48,12 +42,14 @@ def is_domain_allowed(domain: str, whitelist: Set[str]) -> bool:
         return True
 
     # Check if any whitelisted domain is a parent
-    # e.g., 'api.github.com' matches if 'github.com' is whitelisted
-    parts = domain.split('.')
-    for i in range(len(parts)):
-        parent = '.'.join(parts[i:])
-        if parent in whitelist:
+    # e.g., 'api.github.com' matches if 'github.com' is whitelisted.
+    # Walk the label boundaries left to right so each suffix is a single
+    # slice — one set lookup per label, no split/join allocations.
+    dot = domain.find('.')
+    while dot != -1:
+        if domain[dot + 1:] in whitelist:
             return True
+        dot = domain.find('.', dot + 1)
 
     return False
 
@@ -0,0 +1,15 @@
+import pytest
+from vibedom.vm import VMManager
+
+
+@pytest.fixture(scope='session')
+def vibedom_image():
+    """Make sure the vibedom-alpine image exists, checking once per test session.
+
+    VMManager.start() runs the local image without probing for it, so
+    integration fixtures request this to build the image up front (if needed)
+    instead of each test discovering a missing image on its own.
+    """
+    _, runtime_cmd = VMManager._detect_runtime()
+    if not VMManager.image_exists(runtime_cmd):
+        VMManager.build_image()
@@ -9,33 +9,42 @@ from vibedom.session import Session
 
 pytestmark = pytest.mark.integration
 
-@pytest.fixture
-def git_workspace(tmp_path):
-    """Create a test workspace with git repo."""
-    workspace = tmp_path / 'workspace'
+@pytest.fixture(scope='session')
+def git_workspace_template(tmp_path_factory):
+    """Build the test git repo once per session; git_workspace copies it per test."""
+    workspace = tmp_path_factory.mktemp('git-template') / 'workspace'
     workspace.mkdir()
 
+    def git(*args):
+        subprocess.run(['git', *args], cwd=workspace, check=True, capture_output=True)
+
     # Initialize git repo
-    subprocess.run(['git', 'init'], cwd=workspace, check=True)
-    subprocess.run(['git', 'config', 'user.name', 'Test'], cwd=workspace, check=True)
-    subprocess.run(['git', 'config', 'user.email', 'test@test.com'], cwd=workspace, check=True)
+    git('init')
+    git('config', 'user.name', 'Test')
+    git('config', 'user.email', 'test@test.com')
 
     # Create initial commit
     (workspace / 'README.md').write_text('# Test Project')
-    subprocess.run(['git', 'add', '.'], cwd=workspace, check=True)
-    subprocess.run(['git', 'commit', '-m', 'Initial commit'], cwd=workspace, check=True)
+    git('add', '.')
+    git('commit', '-m', 'Initial commit')
 
     # Create feature branch
-    subprocess.run(['git', 'checkout', '-b', 'feature/test'], cwd=workspace, check=True)
+    git('checkout', '-b', 'feature/test')
     (workspace / 'feature.txt').write_text('Feature work')
-    subprocess.run(['git', 'add', '.'], cwd=workspace, check=True)
-    subprocess.run(['git', 'commit', '-m', 'Add feature'], cwd=workspace, check=True)
+    git('add', '.')
+    git('commit', '-m', 'Add feature')
+
+    return workspace
 
-    yield workspace
-    shutil.rmtree(workspace, ignore_errors=True)
+@pytest.fixture
+def git_workspace(git_workspace_template, tmp_path):
+    """Create a test workspace with git repo."""
+    workspace = tmp_path / 'workspace'
+    shutil.copytree(git_workspace_template, workspace, symlinks=True)
+    return workspace
 
 @pytest.fixture
-def config_dir(tmp_path):
+def config_dir(vibedom_image, tmp_path):
     """Create test config directory."""
     config = tmp_path / 'config'
     config.mkdir()
@@ -49,8 +58,7 @@ def config_dir(tmp_path):
     # Create whitelist
     (config / 'trusted_domains.txt').write_text('pypi.org\n')
 
-    yield config
-    shutil.rmtree(config, ignore_errors=True)
+    return config
 
 def test_git_workspace_cloned_with_branch(git_workspace, config_dir, tmp_path):
     """Container clones workspace and checks out current branch."""
@@ -76,7 +84,6 @@ def test_git_workspace_cloned_with_branch(git_workspace, config_dir, tmp_path):
 
     finally:
         vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
 
 def test_bundle_created_and_valid(git_workspace, config_dir, tmp_path):
     """Bundle is created and can be verified."""
@@ -116,7 +123,6 @@ def test_bundle_created_and_valid(git_workspace, config_dir, tmp_path):
 
     finally:
         vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
 
 def test_live_repo_accessible_during_session(git_workspace, config_dir, tmp_path):
     """Live repo can be accessed from host during session."""
@@ -155,8 +161,6 @@ def test_live_repo_accessible_during_session(git_workspace, config_dir, tmp_path
 
     finally:
         vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
-        shutil.rmtree(test_clone, ignore_errors=True)
 
 def test_merge_workflow_from_bundle(git_workspace, config_dir, tmp_path):
     """Bundle can be added as remote and merged."""
@@ -200,7 +204,7 @@ def test_merge_workflow_from_bundle(git_workspace, config_dir, tmp_path):
         assert 'Add feature B' in result.stdout
 
     finally:
-        shutil.rmtree(session.session_dir, ignore_errors=True)
+        vm.stop()
 
 def test_non_git_workspace_initialized(tmp_path, config_dir):
     """Non-git workspace gets initialized as fresh repo."""
@@ -228,6 +232,4 @@ def test_non_git_workspace_initialized(tmp_path, config_dir):
         assert 'exists' in result.stdout
 
     finally:
-        vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
-        shutil.rmtree(workspace, ignore_errors=True)
\ No newline at end of file
+        vm.stop()
\ No newline at end of file
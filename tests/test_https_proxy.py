@@ -14,7 +14,7 @@ def test_workspace(tmp_path):
     yield workspace
 
 @pytest.fixture
-def test_config(tmp_path):
+def test_config(vibedom_image, tmp_path):
     """Create test config directory."""
     config = tmp_path / 'config'
     config.mkdir()
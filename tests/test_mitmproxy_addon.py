@@ -1,7 +1,12 @@
+import asyncio
+import json
+import os
 import sys
 from pathlib import Path
 from unittest.mock import Mock, MagicMock, patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).parent.parent / 'vm'))
 
 try:
@@ -43,7 +48,7 @@ def test_request_headers_pass_through(mock_mkdir):
         "Content-Type": "application/json"
     }
 
-    proxy.request(flow)
+    asyncio.run(proxy.request(flow))
 
     # Authorization header should still be present
     assert flow.request.headers.get("Authorization") == "Bearer sk-ant-api123"
@@ -81,6 +86,32 @@ def test_addon_reads_whitelist_from_env(tmp_path, monkeypatch):
     assert 'example.com' in proxy.whitelist
 
 
+def test_is_allowed_matches_whitelisted_domains_and_subdomains(tmp_path, monkeypatch):
+    """is_allowed should accept whitelisted domains and their subdomains only."""
+    whitelist = tmp_path / 'domains.txt'
+    whitelist.write_text('github.com\npypi.org\n')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(whitelist))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+    proxy = VibedomProxy()
+
+    assert proxy.is_allowed('github.com')
+    assert proxy.is_allowed('API.GitHub.com')
+    assert not proxy.is_allowed('evilgithub.com')
+    assert not proxy.is_allowed('github.com.evil.io')
+    assert not proxy.is_allowed('com')
+    # Repeat lookups (in any case) are served from the cache
+    assert proxy.is_allowed('GitHub.com')
+    assert proxy._allowed_cache.cache_info().hits == 1
+
+    whitelist.write_text('example.com\n')
+    proxy._reload_whitelist(None, None)
+    assert proxy.is_allowed('www.example.com')
+    assert not proxy.is_allowed('github.com')
+
+
 def test_addon_reads_network_log_from_env(tmp_path, monkeypatch):
     """VibedomProxy should write network log to VIBEDOM_NETWORK_LOG_PATH."""
     log_path = tmp_path / 'network.jsonl'
@@ -127,12 +158,119 @@ def test_log_request_includes_timestamp(mock_mkdir, tmp_path, monkeypatch):
     flow.request.host = 'api.anthropic.com'
 
     proxy.log_request(flow, allowed=True)
+    proxy.done()
 
     entry = json_mod.loads(log_path.read_text().strip())
     assert 'timestamp' in entry
     assert 'T' in entry['timestamp']  # ISO format contains 'T' separator
 
 
+def test_log_request_batches_writes_until_flush(tmp_path, monkeypatch):
+    """log_request should only buffer; _flush_log writes the batch, done() closes."""
+    log_path = tmp_path / 'network.jsonl'
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(log_path))
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.pretty_url = 'https://api.anthropic.com/v1/messages'
+    flow.request.host_header = 'api.anthropic.com'
+
+    proxy.log_request(flow, allowed=True)
+    proxy.log_request(flow, allowed=False)
+    assert not log_path.exists()
+
+    proxy._flush_log()
+    fd = proxy._network_log_fd
+    assert [json.loads(line)['allowed'] for line in log_path.read_text().splitlines()] == [True, False]
+
+    proxy.log_request(flow, allowed=True)
+    proxy.done()
+    assert proxy._network_log_fd is None
+    with pytest.raises(OSError):
+        os.fstat(fd)
+    assert len(log_path.read_text().splitlines()) == 3
+
+
+def test_running_starts_periodic_log_flush(tmp_path, monkeypatch):
+    """Once mitmproxy is running, buffered entries reach the log without done()."""
+    log_path = tmp_path / 'network.jsonl'
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(log_path))
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    import mitmproxy_addon
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.pretty_url = 'https://api.anthropic.com/v1/messages'
+    flow.request.host_header = 'api.anthropic.com'
+
+    async def serve():
+        proxy.running()
+        proxy.log_request(flow, allowed=True)
+        await asyncio.sleep(mitmproxy_addon.LOG_FLUSH_INTERVAL * 3)
+        written = log_path.read_text()
+        proxy.done()
+        return written
+
+    assert len(asyncio.run(serve()).splitlines()) == 1
+
+
+def test_done_waits_for_in_flight_log_write(tmp_path, monkeypatch):
+    """done() lets a batch already in a worker thread land before the final flush."""
+    import threading
+    import time
+    log_path = tmp_path / 'network.jsonl'
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(log_path))
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    def slow_write(batch):
+        time.sleep(0.1)
+        proxy._write_log_batch_in_worker(batch)
+
+    # As the flusher does: mark a write in flight, then hand it to a thread
+    proxy._log_write_idle.clear()
+    worker = threading.Thread(target=slow_write, args=([{'seq': 1}],))
+    worker.start()
+    proxy._log_buffer.append({'seq': 2})
+    proxy.done()
+    worker.join()
+
+    assert proxy._network_log_fd is None
+    assert [json.loads(line)['seq'] for line in log_path.read_text().splitlines()] == [1, 2]
+
+
+def test_unserializable_log_entry_is_skipped(tmp_path, monkeypatch, capsys):
+    """An entry that can't be serialized is reported and the rest of the batch still written."""
+    log_path = tmp_path / 'network.jsonl'
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(log_path))
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    proxy._write_log_batch([{'seq': 1}, {'seq': object()}, {'seq': 3}])
+    proxy.done()
+
+    assert [json.loads(line)['seq'] for line in log_path.read_text().splitlines()] == [1, 3]
+    assert "Failed to serialize network log entry" in capsys.readouterr().err
+
+
 @patch('pathlib.Path.mkdir')
 def test_missing_whitelist_prints_warning(mock_mkdir, tmp_path, monkeypatch, capsys):
     """load_whitelist should warn to stderr when whitelist file is missing."""
@@ -180,7 +318,7 @@ def test_json_request_body_stays_valid_after_scrub(mock_mkdir):
     flow.request.url = "https://api.anthropic.com/v1/messages"
     flow.request.headers = {"Content-Type": "application/json"}
 
-    proxy.request(flow)
+    asyncio.run(proxy.request(flow))
 
     # Body must remain valid JSON
     scrubbed = json.loads(flow.request.content.decode('utf-8'))
@@ -208,8 +346,305 @@ def test_non_json_body_falls_back_to_raw_scrub(mock_mkdir):
     flow.request.url = "https://api.anthropic.com/submit"
     flow.request.headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    proxy.request(flow)
+    asyncio.run(proxy.request(flow))
 
     out = flow.request.content.decode('utf-8')
     assert email not in out
     assert "[REDACTED_EMAIL]" in out
+
+
+@patch('pathlib.Path.mkdir')
+def test_non_utf8_body_is_scrubbed(mock_mkdir):
+    """Text bodies that aren't valid UTF-8 are scrubbed as raw bytes."""
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    email = "bob" + chr(64) + "acme.io"  # non-exempt domain
+    raw = b"name=Jos\xe9&contact=" + email.encode('ascii')
+
+    flow = MagicMock()
+    flow.request.host = "api.anthropic.com"
+    flow.request.host_header = "api.anthropic.com"
+    flow.request.content = raw
+    flow.request.pretty_url = "https://api.anthropic.com/submit"
+    flow.request.url = "https://api.anthropic.com/submit"
+    flow.request.headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    asyncio.run(proxy.request(flow))
+
+    assert flow.request.content == b"name=Jos\xe9&contact=[REDACTED_EMAIL]"
+
+
+@patch('pathlib.Path.mkdir')
+def test_large_request_body_scrubbed_off_event_loop_thread(mock_mkdir):
+    """Large bodies are scrubbed in a worker thread, not on the event loop's."""
+    import threading
+    from mitmproxy_addon import VibedomProxy, SCRUB_CACHE_MAX_BODY
+
+    proxy = VibedomProxy()
+    scrub_threads = []
+    scrub_body = proxy._scrub_body
+
+    def recording_scrub_body(content, content_type):
+        scrub_threads.append(threading.current_thread())
+        return scrub_body(content, content_type)
+
+    proxy._scrub_body = recording_scrub_body
+
+    flow = MagicMock()
+    flow.request.host = "api.anthropic.com"
+    flow.request.host_header = "api.anthropic.com"
+    flow.request.content = b"contact=bob&pad=" + b"x" * SCRUB_CACHE_MAX_BODY
+    flow.request.pretty_url = "https://api.anthropic.com/submit"
+    flow.request.url = "https://api.anthropic.com/submit"
+    flow.request.headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    asyncio.run(proxy.request(flow))
+
+    assert len(scrub_threads) == 1
+    assert scrub_threads[0] is not threading.current_thread()
+
+    # Small bodies are scrubbed inline
+    flow.request.content = b"contact=bob"
+    asyncio.run(proxy.request(flow))
+
+    assert len(scrub_threads) == 2
+    assert scrub_threads[1] is threading.current_thread()
+
+
+@patch('pathlib.Path.mkdir')
+def test_identical_bodies_scrubbed_once(mock_mkdir):
+    """A body sent again is served from the scrub cache with the same result."""
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    email = "bob" + chr(64) + "acme.io"  # non-exempt domain
+    raw = ("contact=" + email).encode('utf-8')
+    content_type = "application/x-www-form-urlencoded"
+
+    with patch.object(proxy.scrubber, 'scrub', wraps=proxy.scrubber.scrub) as scrub:
+        first = proxy._scrub_body(raw, content_type)
+        second = proxy._scrub_body(bytes(raw), content_type)
+
+    assert scrub.call_count == 1
+    assert first == second
+    assert first[0] == b"contact=[REDACTED_EMAIL]"
+
+
+@patch('pathlib.Path.mkdir')
+def test_text_body_scrubbed_with_unicode_semantics(mock_mkdir):
+    """Valid UTF-8 bodies are scrubbed as text, so non-ASCII digits still count as digits."""
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    raw = "ssn=٣٣٣-٤٥-٦٧٨٩".encode('utf-8')
+
+    scrubbed, findings = proxy._scrub_body(raw, "text/plain")
+
+    assert scrubbed == b"ssn=[REDACTED_US_SSN]"
+    assert len(findings) == 1
+
+
+@patch('pathlib.Path.mkdir')
+def test_large_bodies_bypass_scrub_cache(mock_mkdir):
+    """Bodies over SCRUB_CACHE_MAX_BODY are scrubbed every time and never cached."""
+    from mitmproxy_addon import VibedomProxy, SCRUB_CACHE_MAX_BODY
+
+    proxy = VibedomProxy()
+    email = "bob" + chr(64) + "acme.io"  # non-exempt domain
+    raw = ("contact=" + email + "&pad=" + "x" * SCRUB_CACHE_MAX_BODY).encode('utf-8')
+    content_type = "application/x-www-form-urlencoded"
+
+    with patch.object(proxy.scrubber, 'scrub', wraps=proxy.scrubber.scrub) as scrub:
+        first = proxy._scrub_body(raw, content_type)
+        second = proxy._scrub_body(raw, content_type)
+
+    assert scrub.call_count == 2
+    assert first == second
+    assert first[0].startswith(b"contact=[REDACTED_EMAIL]&pad=")
+    assert proxy._scrub_body_cached.cache_info().currsize == 0
+
+
+def test_request_blocks_and_logs_non_whitelisted_domain(tmp_path, monkeypatch):
+    """A non-whitelisted request is checked once, logged as blocked, and answered 403."""
+    whitelist = tmp_path / 'domains.txt'
+    whitelist.write_text('pypi.org\n')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(whitelist))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.host = "evil.example"
+    flow.request.host_header = "Evil.Example"
+    flow.request.content = None
+    flow.request.pretty_url = "https://evil.example/"
+    flow.request.url = "https://evil.example/"
+
+    asyncio.run(proxy.request(flow))
+
+    assert proxy._allowed_cache.cache_info().misses == 1
+    assert flow.response.status_code == 403
+    assert proxy._log_buffer[-1]['allowed'] is False
+    assert proxy._log_buffer[-1]['host'] == 'evil.example'
+    assert proxy._log_buffer[-1]['url'] == 'https://evil.example/'
+
+
+def test_log_line_matches_session_log_format():
+    """Log lines use json.dumps' default format, like Session.log_network_request()."""
+    import mitmproxy_addon
+
+    entry = {'url': 'https://example.com/café', 'allowed': True}
+
+    assert mitmproxy_addon._log_line(entry) == (
+        b'{"url": "https://example.com/caf\\u00e9", "allowed": true}\n'
+    )
+
+
+def test_log_sampling_keeps_blocked_and_scrubbed_requests(tmp_path, monkeypatch):
+    """With VIBEDOM_LOG_SAMPLE=N only every Nth plain allowed request is logged."""
+    monkeypatch.setenv('VIBEDOM_LOG_SAMPLE', '3')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+    from dlp_scrubber import Finding
+
+    proxy = VibedomProxy()
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.pretty_url = 'https://pypi.org/simple/'
+    flow.request.host_header = 'pypi.org'
+    finding = Finding('email', 'PII', 'bob@acme.io', 0, 11, '[REDACTED_EMAIL]')
+
+    for _ in range(6):
+        proxy.log_request(flow, allowed=True)
+    proxy.log_request(flow, allowed=False)
+    proxy.log_request(flow, allowed=True, scrubbed=[finding])
+
+    logged = [(e['allowed'], 'scrubbed' in e) for e in proxy._log_buffer]
+    assert logged == [(True, False), (True, False), (False, False), (True, True)]
+
+
+def test_log_sampling_is_per_host(tmp_path, monkeypatch):
+    """Sampling counts each host separately, so every host's first request is logged."""
+    monkeypatch.setenv('VIBEDOM_LOG_SAMPLE', '3')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.pretty_url = 'https://pypi.org/simple/'
+
+    for host in ['pypi.org'] * 4 + ['github.com'] + ['pypi.org'] * 3:
+        proxy.log_request(flow, allowed=True, host=host)
+
+    assert [e['host'] for e in proxy._log_buffer] == ['pypi.org', 'pypi.org', 'github.com', 'pypi.org']
+
+
+def test_invalid_log_sample_falls_back_to_logging_all(tmp_path, monkeypatch, capsys):
+    """A malformed VIBEDOM_LOG_SAMPLE warns and logs every request instead of failing."""
+    monkeypatch.setenv('VIBEDOM_LOG_SAMPLE', 'abc')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+
+    assert proxy._log_sample_n == 1
+    assert "Invalid VIBEDOM_LOG_SAMPLE 'abc'" in capsys.readouterr().err
+
+
+def test_whitelist_reloaded_when_file_changes(tmp_path, monkeypatch):
+    """Editing the whitelist file takes effect without SIGHUP or restart."""
+    whitelist = tmp_path / 'domains.txt'
+    whitelist.write_text('pypi.org\n')
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(whitelist))
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    assert not proxy.is_allowed('github.com')
+
+    proxy._reload_whitelist_if_changed()
+    assert proxy.whitelist == {'pypi.org'}
+
+    whitelist.write_text('pypi.org\ngithub.com\n')
+    stat = whitelist.stat()
+    os.utime(whitelist, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    proxy._reload_whitelist_if_changed()
+    assert proxy.is_allowed('github.com')
+
+
+def test_periodic_log_flush_writes_off_event_loop_thread(tmp_path, monkeypatch):
+    """The background flusher hands log writes to a worker thread."""
+    import threading
+    monkeypatch.setenv('VIBEDOM_NETWORK_LOG_PATH', str(tmp_path / 'network.jsonl'))
+    monkeypatch.setenv('VIBEDOM_WHITELIST_PATH', str(tmp_path / 'domains.txt'))
+    monkeypatch.setenv('VIBEDOM_GITLEAKS_CONFIG', str(tmp_path / 'gitleaks.toml'))
+
+    import mitmproxy_addon
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    write_threads = []
+    write_log_batch = proxy._write_log_batch
+
+    def recording_write_log_batch(batch):
+        write_threads.append(threading.current_thread())
+        write_log_batch(batch)
+
+    proxy._write_log_batch = recording_write_log_batch
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.pretty_url = 'https://pypi.org/simple/'
+    flow.request.host_header = 'pypi.org'
+
+    async def serve():
+        proxy.running()
+        proxy.log_request(flow, allowed=True)
+        await asyncio.sleep(mitmproxy_addon.LOG_FLUSH_INTERVAL * 3)
+        proxy.done()
+
+    asyncio.run(serve())
+
+    assert write_threads and write_threads[0] is not threading.current_thread()
+
+
+@patch('pathlib.Path.mkdir')
+def test_request_logs_scrubbed_url(mock_mkdir):
+    """The logged URL is the scrubbed one, never the original query string."""
+    from mitmproxy_addon import VibedomProxy
+
+    proxy = VibedomProxy()
+    email = "bob" + chr(64) + "acme.io"  # non-exempt domain
+
+    flow = MagicMock()
+    flow.request.method = 'GET'
+    flow.request.host = "api.anthropic.com"
+    flow.request.host_header = "api.anthropic.com"
+    flow.request.content = None
+    flow.request.pretty_url = "https://api.anthropic.com/v1/users?contact=" + email
+
+    asyncio.run(proxy.request(flow))
+
+    logged_url = proxy._log_buffer[-1]['url']
+    assert email not in logged_url
+    assert logged_url == flow.request.url
@@ -9,7 +9,7 @@ from vibedom.whitelist import create_default_whitelist
 pytestmark = pytest.mark.integration
 
 @pytest.fixture
-def vm_with_proxy():
+def vm_with_proxy(vibedom_image):
     """Start VM with mitmproxy configured."""
     with tempfile.TemporaryDirectory() as workspace_dir:
         with tempfile.TemporaryDirectory() as config_dir:
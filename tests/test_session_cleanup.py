@@ -1,5 +1,6 @@
 """Tests for SessionCleanup filter and delete helpers."""
 import json
+import pytest
 from pathlib import Path
 from datetime import datetime, timedelta
 from vibedom.session import Session, SessionCleanup
@@ -26,19 +27,18 @@ def make_session(logs_dir, name, status='complete', days_old=0,
     return Session.load(d)
 
 
-def test_filter_by_age_returns_old_sessions(tmp_path):
+@pytest.mark.parametrize('ages,expected', [
+    ([10, 5, 8], 2),  # only sessions older than the cutoff
+    ([2], 0),         # recent sessions are excluded
+])
+def test_filter_by_age(tmp_path, ages, expected):
     sessions = [
-        make_session(tmp_path, 'session-a', days_old=10),
-        make_session(tmp_path, 'session-b', days_old=5),
-        make_session(tmp_path, 'session-c', days_old=8),
+        make_session(tmp_path, f'session-{i}', days_old=days_old)
+        for i, days_old in enumerate(ages)
     ]
     old = SessionCleanup._filter_by_age(sessions, days=7)
-    assert len(old) == 2
-
-
-def test_filter_by_age_excludes_recent(tmp_path):
-    sessions = [make_session(tmp_path, 'session-a', days_old=2)]
-    assert SessionCleanup._filter_by_age(sessions, days=7) == []
+    assert len(old) == expected
+    assert all(s.state.started_at_dt < datetime.now() - timedelta(days=7) for s in old)
 
 
 def test_filter_not_running_excludes_running_status(tmp_path):
@@ -139,3 +139,44 @@ def test_resolve_running_only_auto_selects_single(tmp_path):
     running = registry.running()
     session = registry.resolve(None, running_only=True, sessions=running)
     assert session.state.session_id == 'myapp-happy-turing'
+
+
+def test_find_stops_at_newest_match(tmp_path):
+    from unittest.mock import patch
+    from vibedom.session import Session
+    make_session_dir(tmp_path, 'session-20260219-100000-000000',
+                     session_id='myapp-old-one')
+    make_session_dir(tmp_path, 'session-20260219-110000-000000',
+                     session_id='myapp-new-one')
+    registry = SessionRegistry(tmp_path)
+    with patch.object(Session, 'load', wraps=Session.load) as mock_load:
+        assert registry.find('myapp').state.session_id == 'myapp-new-one'
+    assert mock_load.call_count == 1
+
+
+def test_find_sees_state_changes(tmp_path):
+    d = make_session_dir(tmp_path, 'session-20260219-100000-000000',
+                         session_id='myapp-happy-turing', status='running')
+    registry = SessionRegistry(tmp_path)
+    assert registry.find('myapp-happy-turing').state.status == 'running'
+
+    state = json.loads((d / 'state.json').read_text())
+    state['status'] = 'complete'
+    (d / 'state.json').write_text(json.dumps(state))
+    assert registry.find('myapp-happy-turing').state.status == 'complete'
+
+
+def test_find_sees_session_created_after_first_lookup(tmp_path):
+    make_session_dir(tmp_path, 'session-20260219-100000-000000',
+                     session_id='myapp-happy-turing')
+    registry = SessionRegistry(tmp_path)
+    assert registry.find('myapp-happy-turing') is not None
+    assert registry.find('other-bold-lovelace') is None
+
+    make_session_dir(tmp_path, 'session-20260219-110000-000000',
+                     workspace='/Users/test/other',
+                     session_id='other-bold-lovelace')
+    session = registry.find('other-bold-lovelace')
+    assert session is not None
+    assert session.state.session_id == 'other-bold-lovelace'
+    assert registry.find('other').state.session_id == 'other-bold-lovelace'
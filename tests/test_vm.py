@@ -1,160 +1,221 @@
-import tempfile
+import re
 import subprocess
-from pathlib import Path
 import pytest
-import shutil
-from unittest.mock import patch, MagicMock
-from vibedom.vm import VMManager
-from vibedom.session import Session
+from unittest.mock import patch, Mock, MagicMock
+from vibedom.vm import VMManager, _which
 from vibedom.project_config import Mount
 
+NO_RUNTIME_ERROR = re.compile("No container runtime found")
+NO_DOCKER_ERROR = re.compile("Docker runtime requested but not found")
+NOT_READY_ERROR = re.compile("failed to become ready")
+
+@pytest.fixture(autouse=True)
+def clear_which_cache():
+    """Tests patch shutil.which per case; don't let memoized lookups leak between them."""
+    _which.cache_clear()
+    yield
+    _which.cache_clear()
+
 @pytest.fixture
-def test_workspace():
+def test_workspace(tmp_path):
     """Create a temporary workspace for testing."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        workspace = Path(tmpdir) / 'workspace'
-        workspace.mkdir()
-        (workspace / 'test.txt').write_text('hello')
-        yield workspace
+    workspace = tmp_path / 'workspace'
+    workspace.mkdir()
+    (workspace / 'test.txt').write_text('hello')
+    return workspace
 
 @pytest.fixture
-def test_config():
+def test_config(tmp_path):
     """Create a temporary config directory."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        config_dir = Path(tmpdir)
-        yield config_dir
-
-@pytest.mark.integration
-def test_vm_start_stop(test_workspace, test_config):
-    """Should start and stop VM successfully."""
-    vm = VMManager(test_workspace, test_config)
+    config_dir = tmp_path / 'config'
+    config_dir.mkdir()
+    return config_dir
 
+@pytest.fixture
+def installed(monkeypatch):
+    """installed(*commands): make shutil.which report only those commands for the rest of the test."""
+    def install(*commands):
+        monkeypatch.setattr('shutil.which', _which_only(*commands))
+    return install
+
+@pytest.fixture(scope='module')
+def started_vm(vibedom_image, tmp_path_factory):
+    """Start one container shared by all integration tests in this module.
+
+    Container start (image layer mount + startup.sh clone) dominates the cost of
+    these tests, so it is paid once per module rather than once per test. The
+    workspace is a git repo with an initial commit so every test can run
+    against the same VM.
+    """
+    workspace = tmp_path_factory.mktemp('vm') / 'workspace'
+    workspace.mkdir()
+    (workspace / 'test.txt').write_text('test content')
+    subprocess.run(
+        ['sh', '-c',
+         'git init -q && git add . && '
+         'git -c user.name=Test -c user.email=test@test.com commit -q -m Initial'],
+        cwd=workspace, check=True, capture_output=True,
+    )
+
+    config_dir = tmp_path_factory.mktemp('config')
+    session_dir = tmp_path_factory.mktemp('session')
+    vm = VMManager(workspace, config_dir, session_dir=session_dir)
     vm.start()
+    try:
+        yield vm
+    finally:
+        vm.stop()
 
-    # Check container is running
-    result = vm.exec(['echo', 'test'])
-    assert result.returncode == 0
-    assert 'test' in result.stdout
+@pytest.fixture
+def shared_vm(started_vm):
+    """The shared VM, with /work/repo reset to its committed state after the test.
 
-    vm.stop()
+    Lets tests mutate the repo without restarting the container or leaking
+    changes into the next test.
+    """
+    yield started_vm
+    started_vm.exec(['sh', '-c', 'cd /work/repo && git reset --hard -q && git clean -fdxq'])
 
 @pytest.mark.integration
-def test_vm_git_repo_initialized(test_workspace, test_config):
-    """VM should initialize git repo from workspace."""
-    import subprocess
-    from vibedom.session import Session
-
-    # Create test git workspace
-    (test_workspace / 'test.txt').write_text('test content')
-    subprocess.run(['git', 'init'], cwd=test_workspace, check=True)
-    subprocess.run(['git', 'add', '.'], cwd=test_workspace, check=True)
-    subprocess.run(['git', 'commit', '-m', 'Initial'], cwd=test_workspace, check=True)
+@pytest.mark.xdist_group('vm_integration')
+def test_vm_start_stop(started_vm):
+    """Should start VM successfully and accept exec commands."""
+    result = started_vm.exec(['echo', 'test'])
+    assert result.returncode == 0
+    assert 'test' in result.stdout
 
-    session = Session(test_workspace, Path('/tmp/vibedom-test-logs'))
-    vm = VMManager(test_workspace, test_config, session_dir=session.session_dir)
+@pytest.mark.integration
+@pytest.mark.xdist_group('vm_integration')
+def test_vm_start_stop_non_git_workspace(vibedom_image, tmp_path):
+    """Should snapshot a non-git workspace into a fresh repo, and stop() should remove the container."""
+    # Its own container name, so it can't collide with the shared VM's
+    workspace = tmp_path / 'plain-workspace'
+    workspace.mkdir()
+    (workspace / 'test.txt').write_text('test content')
+    config_dir = tmp_path / 'config'
+    config_dir.mkdir()
+    session_dir = tmp_path / 'session'
+    session_dir.mkdir()
 
+    vm = VMManager(workspace, config_dir, session_dir=session_dir)
+    vm.start()
     try:
-        vm.start()
-
-        # Verify git repo initialized in container
-        result = vm.exec(['sh', '-c', 'cd /work/repo && git log --oneline'])
-        assert 'Initial' in result.stdout
-
+        result = vm.exec(['sh', '-c', 'cd /work/repo && cat test.txt && git log --oneline'])
+        assert result.returncode == 0
+        assert 'test content' in result.stdout
+        assert 'Initial snapshot' in result.stdout
     finally:
         vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
+
+    assert not vm.exists()
 
 @pytest.mark.integration
-def test_vm_mounts_session_repo(test_workspace, test_config):
+@pytest.mark.xdist_group('vm_integration')
+def test_vm_git_repo_initialized(shared_vm):
+    """VM should initialize git repo from workspace."""
+    result = shared_vm.exec(['sh', '-c', 'cd /work/repo && git log --oneline'])
+    assert 'Initial' in result.stdout
+
+@pytest.mark.integration
+@pytest.mark.xdist_group('vm_integration')
+def test_vm_mounts_session_repo(shared_vm):
     """VM should mount session repo directory."""
-    session = Session(test_workspace, Path('/tmp/vibedom-test-logs'))
+    # Verify repo directory exists in session
+    repo_dir = shared_vm.session_dir / 'repo'
+    assert repo_dir.exists(), "Repo directory should exist in session dir"
 
-    vm = VMManager(test_workspace, test_config, session_dir=session.session_dir)
+    # Verify .git exists in mounted repo
+    git_dir = repo_dir / '.git'
+    assert git_dir.exists(), "Git directory should exist in mounted repo"
 
-    try:
-        vm.start()
 
-        # Verify repo directory exists in session
-        repo_dir = session.session_dir / 'repo'
-        assert repo_dir.exists(), "Repo directory should exist in session dir"
+def _completed(returncode=0, stdout='', stderr=''):
+    """A lightweight stand-in for the CompletedProcess returned by subprocess.run."""
+    return Mock(spec=subprocess.CompletedProcess, returncode=returncode, stdout=stdout, stderr=stderr)
 
-        # Verify .git exists in mounted repo
-        git_dir = repo_dir / '.git'
-        assert git_dir.exists(), "Git directory should exist in mounted repo"
+def _which_only(*available):
+    """shutil.which side effect that reports only the given commands as installed."""
+    return lambda cmd: f'/usr/local/bin/{cmd}' if cmd in available else None
 
-    finally:
-        vm.stop()
-        shutil.rmtree(session.session_dir, ignore_errors=True)
+
+def _calls_by_subcommand(mock_run):
+    """Index a patched subprocess.run's argv lists by subcommand (argv[1]); last call wins."""
+    return {c[0][0][1]: c[0][0] for c in mock_run.call_args_list if len(c[0][0]) > 1}
 
 
-def test_detect_runtime_prefers_docker(test_workspace, test_config):
-    """Should prefer Docker when both runtimes are available."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/' + cmd if cmd in ('docker', 'container') else None
-        vm = VMManager(test_workspace, test_config)
-        assert vm.runtime == 'docker'
-        assert vm.runtime_cmd == 'docker'
+def _run_argv(mock_run):
+    """Extract the container-runtime 'run' argv from a patched subprocess.run."""
+    return _calls_by_subcommand(mock_run)['run']
+
+
+def _env_flags(cmd):
+    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-e' and i + 1 < len(cmd)]
 
 
-def test_detect_runtime_falls_back_to_apple(test_workspace, test_config):
-    """Should fall back to apple/container when Docker is not available."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/container' if cmd == 'container' else None
-        vm = VMManager(test_workspace, test_config)
-        assert vm.runtime == 'apple'
-        assert vm.runtime_cmd == 'container'
+def _volumes(cmd):
+    """Map each -v mount's container path to its full spec (e.g. '/work/repo' -> 'src:/work/repo')."""
+    return {
+        cmd[i + 1].split(':')[1]: cmd[i + 1]
+        for i, arg in enumerate(cmd) if arg == '-v' and i + 1 < len(cmd)
+    }
 
 
-def test_detect_runtime_uses_docker_when_only_docker(test_workspace, test_config):
-    """Should use Docker when only Docker is available."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(test_workspace, test_config)
-        assert vm.runtime == 'docker'
-        assert vm.runtime_cmd == 'docker'
+@pytest.mark.parametrize('available,runtime,runtime_cmd', [
+    pytest.param(('docker', 'container'), 'apple', 'container', id='prefers-apple'),
+    pytest.param(('container',), 'apple', 'container', id='apple-only'),
+    pytest.param(('docker',), 'docker', 'docker', id='falls-back-to-docker'),
+])
+def test_detect_runtime(test_workspace, test_config, available, runtime, runtime_cmd, installed):
+    """Auto-detect prefers apple/container and falls back to Docker."""
+    installed(*available)
+    vm = VMManager(test_workspace, test_config)
+    assert vm.runtime == runtime
+    assert vm.runtime_cmd == runtime_cmd
 
 
-def test_detect_runtime_raises_when_neither(test_workspace, test_config):
+def test_detect_runtime_raises_when_neither(test_workspace, test_config, installed):
     """Should raise RuntimeError when no runtime found."""
-    with patch('shutil.which', return_value=None):
-        with pytest.raises(RuntimeError, match="No container runtime found"):
-            VMManager(test_workspace, test_config)
+    installed()
+    with pytest.raises(RuntimeError, match=NO_RUNTIME_ERROR):
+        VMManager(test_workspace, test_config)
 
 
-def test_explicit_runtime_docker(test_workspace, test_config):
+def test_explicit_runtime_docker(test_workspace, test_config, installed):
     """Should use Docker when explicitly specified."""
-    with patch('shutil.which') as mock_which:
-        mock_which.return_value = '/usr/local/bin/docker'
-        vm = VMManager(test_workspace, test_config, runtime='docker')
-        assert vm.runtime == 'docker'
-        assert vm.runtime_cmd == 'docker'
+    installed('docker')
+    vm = VMManager(test_workspace, test_config, runtime='docker')
+    assert vm.runtime == 'docker'
+    assert vm.runtime_cmd == 'docker'
 
 
-def test_explicit_runtime_apple(test_workspace, test_config):
+def test_explicit_runtime_apple(test_workspace, test_config, installed):
     """Should use apple/container when explicitly specified."""
-    with patch('shutil.which') as mock_which:
-        mock_which.return_value = '/usr/local/bin/container'
-        vm = VMManager(test_workspace, test_config, runtime='apple')
-        assert vm.runtime == 'apple'
-        assert vm.runtime_cmd == 'container'
+    installed('container')
+    vm = VMManager(test_workspace, test_config, runtime='apple')
+    assert vm.runtime == 'apple'
+    assert vm.runtime_cmd == 'container'
 
 
-def test_explicit_runtime_raises_if_not_available(test_workspace, test_config):
+def test_explicit_runtime_raises_if_not_available(test_workspace, test_config, installed):
     """Should raise RuntimeError when explicit runtime not found."""
-    with patch('shutil.which', return_value=None):
-        with pytest.raises(RuntimeError, match="Docker runtime requested but not found"):
-            VMManager(test_workspace, test_config, runtime='docker')
+    installed()
+    with pytest.raises(RuntimeError, match=NO_DOCKER_ERROR):
+        VMManager(test_workspace, test_config, runtime='docker')
 
 
-def test_start_uses_apple_runtime(test_workspace, test_config, tmp_path):
-    """start() should use 'container' command when runtime is apple."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/container' if cmd == 'container' else None
-        vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
+@pytest.mark.parametrize('runtime_cmd,detach_flag', [
+    pytest.param('container', '--detach', id='apple'),
+    pytest.param('docker', '-d', id='docker'),
+])
+def test_start_uses_detected_runtime(test_workspace, test_config, tmp_path,
+                                     runtime_cmd, detach_flag, installed):
+    """start() should run the container with the detected runtime's command and detach flag."""
+    installed(runtime_cmd)
+    vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
 
     with patch('vibedom.vm.VMManager._apple_host_ip', return_value='192.168.64.1'):
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+            mock_run.return_value = _completed()
             with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
                 mock_proxy = MagicMock()
                 mock_proxy.start.return_value = 54321
@@ -166,40 +227,13 @@ def test_start_uses_apple_runtime(test_workspace, test_config, tmp_path):
                     except RuntimeError:
                         pass
 
-            calls = mock_run.call_args_list
-            run_call = next(c for c in calls if 'run' in c[0][0])
-            assert run_call[0][0][0] == 'container'
-            assert '--detach' in run_call[0][0]
-            assert '--privileged' not in run_call[0][0]
-
-
-def test_start_uses_docker_runtime(test_workspace, test_config, tmp_path):
-    """start() should use 'docker' command when runtime is docker."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
-
-    with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
-        with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
-            mock_proxy = MagicMock()
-            mock_proxy.start.return_value = 54321
-            mock_proxy.ca_cert_path = None
-            mock_proxy_cls.return_value = mock_proxy
-            with patch('shutil.copy'):
-                try:
-                    vm.start()
-                except RuntimeError:
-                    pass
-
-        calls = mock_run.call_args_list
-        run_call = next(c for c in calls if 'run' in c[0][0])
-        assert run_call[0][0][0] == 'docker'
-        assert '-d' in run_call[0][0]
-        assert '--privileged' not in run_call[0][0]
+    cmd = _run_argv(mock_run)
+    assert cmd[0] == runtime_cmd
+    assert detach_flag in cmd
+    assert '--privileged' not in cmd
 
 
-def test_start_sets_ssh_auth_sock_env(test_workspace, test_config, tmp_path):
+def test_start_sets_ssh_auth_sock_env(test_workspace, test_config, tmp_path, installed):
     """start() should set SSH_AUTH_SOCK as a container env var so every exec
     session inherits it — not just login shells that source /etc/profile.d.
 
@@ -208,12 +242,11 @@ def test_start_sets_ssh_auth_sock_env(test_workspace, test_config, tmp_path):
     ephemeral 'attach' shell, agent-run commands, scripts) couldn't reach the
     agent and git fell back to prompting for credentials.
     """
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
+    installed('docker')
+    vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+        mock_run.return_value = _completed()
         with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
             mock_proxy = MagicMock()
             mock_proxy.start.return_value = 54321
@@ -225,117 +258,72 @@ def test_start_sets_ssh_auth_sock_env(test_workspace, test_config, tmp_path):
                 except RuntimeError:
                     pass
 
-        calls = mock_run.call_args_list
-        run_call = next(c for c in calls if 'run' in c[0][0])
-        cmd = run_call[0][0]
+        cmd = _run_argv(mock_run)
         # The -e flag and its value must appear as adjacent argv entries
         assert 'SSH_AUTH_SOCK=/tmp/ssh-agent.sock' in cmd
         idx = cmd.index('SSH_AUTH_SOCK=/tmp/ssh-agent.sock')
         assert cmd[idx - 1] == '-e'
 
 
-def test_stop_uses_apple_commands(test_workspace, test_config):
-    """stop() should use 'container stop' + 'container delete' for apple runtime."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/container' if cmd == 'container' else None
-        vm = VMManager(test_workspace, test_config)
-
-    with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
-        vm.stop()
-
-        calls = [c[0][0] for c in mock_run.call_args_list]
-        assert calls[0][:2] == ['container', 'stop']
-        assert calls[1][:2] == ['container', 'delete']
-
-
-def test_stop_uses_docker_command(test_workspace, test_config):
-    """stop() should use 'docker rm -f' for docker runtime."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(test_workspace, test_config)
+@pytest.mark.parametrize('runtime_cmd,expected', [
+    pytest.param('container', [['container', 'stop'], ['container', 'delete', '--force']],
+                 id='apple'),
+    pytest.param('docker', [['docker', 'rm', '-f']], id='docker'),
+])
+def test_stop_uses_runtime_commands(test_workspace, test_config, runtime_cmd, expected, installed):
+    """stop() should use 'container stop' + 'container delete' on apple, 'docker rm -f' on docker."""
+    installed(runtime_cmd)
+    vm = VMManager(test_workspace, test_config)
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+        mock_run.return_value = _completed()
         vm.stop()
 
-        calls = [c[0][0] for c in mock_run.call_args_list]
-        assert calls[0] == ['docker', 'rm', '-f', vm.container_name]
+    calls = [c[0][0] for c in mock_run.call_args_list]
+    assert calls == [prefix + [vm.container_name] for prefix in expected]
 
 
-def test_exec_uses_detected_runtime(test_workspace, test_config):
+def test_exec_uses_detected_runtime(test_workspace, test_config, installed):
     """exec() should use detected runtime command."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/container' if cmd == 'container' else None
-        vm = VMManager(test_workspace, test_config)
+    installed('container')
+    vm = VMManager(test_workspace, test_config)
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(
-            args=[], returncode=0, stdout='hello', stderr=''
-        )
+        mock_run.return_value = _completed(stdout='hello')
         vm.exec(['echo', 'hello'])
 
         call_args = mock_run.call_args[0][0]
         assert call_args[:2] == ['container', 'exec']
 
 
-def test_start_mounts_claude_volume(test_workspace, test_config, tmp_path):
-    """start() should mount vibedom-claude-config volume for Claude persistence."""
-    session_dir = tmp_path / 'session'
-    session_dir.mkdir()
-
-    with patch('shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(test_workspace, test_config, session_dir)
-
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            with patch('shutil.copy'):
-                with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
-                    mock_proxy = MagicMock()
-                    mock_proxy.start.return_value = 54321
-                    mock_proxy.ca_cert_path = None
-                    mock_proxy_cls.return_value = mock_proxy
-                    try:
-                        vm.start()
-                    except RuntimeError:
-                        pass  # May fail on readiness check, that's ok
-
-            # Find the 'run' call
-            calls = mock_run.call_args_list
-            run_call = next(c for c in calls if 'run' in c[0][0])
-            cmd = run_call[0][0]
-
-            # Check that Claude config volume is mounted
-            assert '-v' in cmd
-            volume_mount = 'vibedom-claude-config:/root/.claude'
-            assert volume_mount in cmd, f"Claude config volume mount '{volume_mount}' not found in command"
-
-
-def test_start_skips_claude_mounts_if_not_exists(test_workspace, test_config, tmp_path):
-    """start() should not fail if ~/.claude doesn't exist."""
-    session_dir = tmp_path / 'session'
-    session_dir.mkdir()
-
-    # No .claude directory exists
-    with patch('vibedom.vm.Path.home', return_value=tmp_path):
-        with patch('shutil.which', return_value='/usr/bin/docker'):
-            vm = VMManager(test_workspace, test_config, session_dir)
-
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            with patch('shutil.copy'):
-                with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
-                    mock_proxy = MagicMock()
-                    mock_proxy.start.return_value = 54321
-                    mock_proxy.ca_cert_path = None
-                    mock_proxy_cls.return_value = mock_proxy
-                    try:
-                        vm.start()
-                    except RuntimeError:
-                        pass
+@pytest.mark.parametrize('runtime_cmd', ['docker', 'container'])
+def test_start_mounts_claude_config(test_workspace, test_config, tmp_path, runtime_cmd, installed):
+    """start() should mount the shared Claude config: a named volume on Docker, a
+    bind mount of ~/.vibedom/claude-config on apple/container (created if missing)."""
+    home = tmp_path / 'home'
+    home.mkdir()  # no ~/.claude or ~/.vibedom yet
+    installed(runtime_cmd)
+    vm = VMManager(test_workspace, test_config, tmp_path / 'session')
+
+    with (
+        patch('vibedom.vm.Path.home', return_value=home),
+        patch('vibedom.vm.VMManager._apple_host_ip', return_value='192.168.64.1'),
+        patch('subprocess.run') as mock_run,
+        patch('shutil.copy'),
+        patch('vibedom.vm.ProxyManager') as mock_proxy_cls,
+    ):
+        mock_run.return_value = _completed()
+        mock_proxy_cls.return_value.start.return_value = 54321
+        vm.start()
 
-            # Should still succeed, just without Claude mounts
-            assert mock_run.called
+    cmd = _run_argv(mock_run)
+    if runtime_cmd == 'docker':
+        expected = 'vibedom-claude-config:/root/.claude'
+    else:
+        claude_config_dir = home / '.vibedom' / 'claude-config'
+        assert claude_config_dir.is_dir()
+        expected = f'{claude_config_dir}:/root/.claude'
+    assert _volumes(cmd)['/root/.claude'] == expected
 
 
 def test_vm_start_uses_host_proxy(tmp_path):
@@ -356,7 +344,7 @@ def test_vm_start_uses_host_proxy(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
@@ -364,9 +352,7 @@ def test_vm_start_uses_host_proxy(tmp_path):
                     pass
 
         assert mock_proxy.start.called
-        run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-        assert run_calls, "Expected a 'docker run' call"
-        cmd = ' '.join(run_calls[0][0][0])
+        cmd = ' '.join(_run_argv(mock_run))
         assert 'host.docker.internal' in cmd
         assert '54321' in cmd
 
@@ -385,16 +371,14 @@ def test_vm_start_with_project_network(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-        run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-        assert run_calls, "Expected a 'docker run' call"
-        cmd = ' '.join(run_calls[0][0][0])
+        cmd = ' '.join(_run_argv(mock_run))
         assert '--network' in cmd
         assert 'wapi_shared' in cmd
 
@@ -414,7 +398,7 @@ def test_vm_start_network_ignored_with_apple_runtime(tmp_path):
             mock_proxy_cls.return_value = mock_proxy
 
             with patch('subprocess.run') as mock_run:
-                mock_run.return_value = MagicMock(returncode=0)
+                mock_run.return_value = _completed()
                 with patch('shutil.copy'):
                     import io
                     with patch('vibedom.vm.sys.stderr', new_callable=io.StringIO) as mock_stderr:
@@ -426,9 +410,7 @@ def test_vm_start_network_ignored_with_apple_runtime(tmp_path):
 
     assert 'network' in warning.lower()
     assert 'apple' in warning.lower() or 'not supported' in warning.lower()
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    assert run_calls
-    cmd = ' '.join(run_calls[0][0][0])
+    cmd = ' '.join(_run_argv(mock_run))
     assert '--network' not in cmd
 
 
@@ -442,7 +424,7 @@ def test_vm_stop_stops_proxy(tmp_path):
     mock_proxy = MagicMock()
     vm._proxy = mock_proxy
 
-    with patch('subprocess.run', return_value=MagicMock(returncode=0)):
+    with patch('subprocess.run', return_value=_completed()):
         vm.stop()
 
     assert mock_proxy.stop.called
@@ -463,15 +445,14 @@ def test_vm_start_adds_host_aliases_for_docker(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     cmd_str = ' '.join(cmd)
     assert '--add-host' in cmd_str
     assert 'wapi-redis:host.docker.internal' in cmd_str
@@ -494,15 +475,14 @@ def test_vm_start_adds_host_aliases_env_for_apple(tmp_path):
             mock_proxy_cls.return_value = mock_proxy
 
             with patch('subprocess.run') as mock_run:
-                mock_run.return_value = MagicMock(returncode=0)
+                mock_run.return_value = _completed()
                 with patch('shutil.copy'):
                     try:
                         vm.start()
                     except RuntimeError:
                         pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     # Find the VIBEDOM_HOST_ALIASES value
     aliases_value = None
     for i, arg in enumerate(cmd):
@@ -515,14 +495,14 @@ def test_vm_start_adds_host_aliases_env_for_apple(tmp_path):
     assert aliases.get('wapi-mysql') == '192.168.64.1'
 
 
-def test_vm_start_passes_extra_env_vars(tmp_path):
+def test_vm_start_passes_extra_env_vars(tmp_path, installed):
     """start() should pass each extra_env entry as a -e KEY=VALUE flag."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session',
-                       runtime='docker',
-                       extra_env={'DB_PORT': 1234, 'DB_HOST': 'host.docker.internal'})
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session',
+                   runtime='docker',
+                   extra_env={'DB_PORT': 1234, 'DB_HOST': 'host.docker.internal'})
 
     with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
         mock_proxy = MagicMock()
@@ -531,29 +511,28 @@ def test_vm_start_passes_extra_env_vars(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     # Collect all -e values
     env_flags = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-e' and i + 1 < len(cmd)]
     assert 'DB_PORT=1234' in env_flags
     assert 'DB_HOST=host.docker.internal' in env_flags
 
 
-def test_vm_start_extra_env_does_not_override_proxy_vars(tmp_path):
+def test_vm_start_extra_env_does_not_override_proxy_vars(tmp_path, installed):
     """start() should not let extra_env clobber the reserved proxy/CA env vars."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session',
-                       runtime='docker',
-                       extra_env={'HTTP_PROXY': 'http://evil:9999'})
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session',
+                   runtime='docker',
+                   extra_env={'HTTP_PROXY': 'http://evil:9999'})
 
     with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
         mock_proxy = MagicMock()
@@ -562,15 +541,14 @@ def test_vm_start_extra_env_does_not_override_proxy_vars(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     env_flags = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-e' and i + 1 < len(cmd)]
     assert 'HTTP_PROXY=http://evil:9999' not in env_flags
     assert 'HTTP_PROXY=http://host.docker.internal:54321' in env_flags
@@ -579,19 +557,19 @@ def test_vm_start_extra_env_does_not_override_proxy_vars(tmp_path):
 HOST_GIT_EMAIL = 'jane' + '@' + 'example.com'
 
 
-def test_host_git_identity_reads_global_config(tmp_path):
+def test_host_git_identity_reads_global_config(tmp_path, installed):
     """_host_git_identity() should read the host's GLOBAL git identity, not a per-repo override."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     def fake_run(cmd, *a, **k):
         if cmd[-1] == 'user.name':
-            return MagicMock(returncode=0, stdout='Jane Dev\n')
+            return _completed(returncode=0, stdout='Jane Dev\n')
         if cmd[-1] == 'user.email':
-            return MagicMock(returncode=0, stdout=HOST_GIT_EMAIL + '\n')
-        return MagicMock(returncode=1, stdout='')
+            return _completed(returncode=0, stdout=HOST_GIT_EMAIL + '\n')
+        return _completed(returncode=1, stdout='')
 
     with patch('subprocess.run', side_effect=fake_run) as mock_run:
         name, email = vm._host_git_identity()
@@ -604,14 +582,14 @@ def test_host_git_identity_reads_global_config(tmp_path):
         assert '-C' not in cmd, f"unexpected workspace-scoped read in {cmd}"
 
 
-def test_host_git_identity_returns_none_when_unset(tmp_path):
+def test_host_git_identity_returns_none_when_unset(tmp_path, installed):
     """_host_git_identity() should return (None, None) when git reports no identity."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
-    with patch('subprocess.run', return_value=MagicMock(returncode=1, stdout='')):
+    with patch('subprocess.run', return_value=_completed(returncode=1, stdout='')):
         name, email = vm._host_git_identity()
     assert name is None
     assert email is None
@@ -621,23 +599,19 @@ def _git_identity_side_effect(name, email):
     """subprocess.run stub: answer git-config identity reads, succeed for everything else."""
     def fake_run(cmd, *a, **k):
         if cmd[:3] == ['git', 'config', '--global'] and cmd[-1] == 'user.name':
-            return MagicMock(returncode=(0 if name else 1), stdout=(f'{name}\n' if name else ''))
+            return _completed(returncode=(0 if name else 1), stdout=(f'{name}\n' if name else ''))
         if cmd[:3] == ['git', 'config', '--global'] and cmd[-1] == 'user.email':
-            return MagicMock(returncode=(0 if email else 1), stdout=(f'{email}\n' if email else ''))
-        return MagicMock(returncode=0, stdout='')
+            return _completed(returncode=(0 if email else 1), stdout=(f'{email}\n' if email else ''))
+        return _completed(returncode=0, stdout='')
     return fake_run
 
 
-def _env_flags(cmd):
-    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-e' and i + 1 < len(cmd)]
-
-
-def test_vm_start_injects_host_git_identity(tmp_path):
+def test_vm_start_injects_host_git_identity(tmp_path, installed):
     """start() should inject VIBEDOM_GIT_NAME/EMAIL when the host has an identity."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session', runtime='docker')
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session', runtime='docker')
 
     with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
         mock_proxy = MagicMock()
@@ -651,19 +625,18 @@ def test_vm_start_injects_host_git_identity(tmp_path):
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     env_flags = _env_flags(cmd)
     assert 'VIBEDOM_GIT_NAME=Jane Dev' in env_flags
     assert f'VIBEDOM_GIT_EMAIL={HOST_GIT_EMAIL}' in env_flags
 
 
-def test_vm_start_omits_git_identity_when_host_has_none(tmp_path):
+def test_vm_start_omits_git_identity_when_host_has_none(tmp_path, installed):
     """start() should not inject VIBEDOM_GIT_* when the host has no git identity."""
     workspace = tmp_path / 'myapp'
     workspace.mkdir()
-    with patch('vibedom.vm.shutil.which', return_value='/usr/bin/docker'):
-        vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session', runtime='docker')
+    installed('docker')
+    vm = VMManager(workspace, tmp_path / 'config', tmp_path / 'session', runtime='docker')
 
     with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
         mock_proxy = MagicMock()
@@ -677,8 +650,7 @@ def test_vm_start_omits_git_identity_when_host_has_none(tmp_path):
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     env_flags = _env_flags(cmd)
     assert not any(f.startswith('VIBEDOM_GIT_NAME=') for f in env_flags)
     assert not any(f.startswith('VIBEDOM_GIT_EMAIL=') for f in env_flags)
@@ -697,15 +669,14 @@ def test_vm_start_no_host_aliases_adds_no_add_host(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    cmd = run_calls[0][0][0]
+    cmd = _run_argv(mock_run)
     # host.docker.internal is added for Docker by default, but no extra --add-host entries
     add_host_entries = [cmd[i + 1] for i, a in enumerate(cmd) if a == '--add-host']
     non_default = [e for e in add_host_entries if not e.startswith('host.docker.internal')]
@@ -721,7 +692,7 @@ def test_vm_exists_returns_true_when_container_present(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _completed()
         assert vm.exists() is True
 
     call_args = mock_run.call_args[0][0]
@@ -735,7 +706,7 @@ def test_vm_exists_returns_false_when_container_absent(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=1)
+        mock_run.return_value = _completed(returncode=1)
         assert vm.exists() is False
 
 
@@ -746,7 +717,7 @@ def test_vm_is_running_returns_true_when_running(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0, stdout='running\n')
+        mock_run.return_value = _completed(returncode=0, stdout='running\n')
         assert vm.is_running() is True
 
 
@@ -757,7 +728,7 @@ def test_vm_is_running_returns_false_when_stopped(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0, stdout='exited\n')
+        mock_run.return_value = _completed(returncode=0, stdout='exited\n')
         assert vm.is_running() is False
 
 
@@ -768,7 +739,7 @@ def test_vm_is_running_returns_false_when_inspect_fails(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=1, stdout='')
+        mock_run.return_value = _completed(returncode=1, stdout='')
         assert vm.is_running() is False
 
 
@@ -779,7 +750,7 @@ def test_vm_pause_stops_without_removing_docker(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='docker')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _completed()
         vm.pause()
 
     calls = [c[0][0] for c in mock_run.call_args_list]
@@ -794,7 +765,7 @@ def test_vm_pause_stops_without_removing_apple(tmp_path):
     vm = VMManager(workspace, tmp_path / 'config', runtime='apple')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _completed()
         vm.pause()
 
     calls = [c[0][0] for c in mock_run.call_args_list]
@@ -810,13 +781,41 @@ def test_vm_restart_starts_stopped_container(tmp_path):
 
     # First call (docker start) succeeds, second call (docker exec test) succeeds
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _completed()
         vm.restart()
 
     calls = [c[0][0] for c in mock_run.call_args_list]
     assert any(c[:2] == ['docker', 'start'] for c in calls)
 
 
+def test_wait_until_ready_polls_until_marker_exists(test_workspace, test_config, installed):
+    """_wait_until_ready() should keep probing at a sub-second interval until ready."""
+    installed('docker')
+    vm = VMManager(test_workspace, test_config)
+
+    results = [_completed(returncode=1), _completed(returncode=1), _completed()]
+    with patch('subprocess.run', side_effect=results) as mock_run:
+        with patch('vibedom.vm.time.sleep') as mock_sleep:
+            vm._wait_until_ready()
+
+    assert mock_run.call_count == 3
+    assert mock_run.call_args[0][0][-3:] == ['test', '-f', '/tmp/.vm-ready']
+    assert all(c[0][0] < 1 for c in mock_sleep.call_args_list)
+
+
+def test_wait_until_ready_times_out(test_workspace, test_config, installed):
+    """_wait_until_ready() should raise once the deadline passes."""
+    installed('docker')
+    vm = VMManager(test_workspace, test_config)
+
+    clock = iter(range(0, 1000, 30))
+    with patch('subprocess.run', return_value=_completed(returncode=1)):
+        with patch('vibedom.vm.time.sleep'):
+            with patch('vibedom.vm.time.monotonic', side_effect=lambda: next(clock)):
+                with pytest.raises(RuntimeError, match=NOT_READY_ERROR):
+                    vm._wait_until_ready()
+
+
 def test_vm_start_mounts_repo_from_container_dir(tmp_path):
     """start() should mount repo from container_dir when provided."""
     workspace = tmp_path / 'myapp'
@@ -833,26 +832,18 @@ def test_vm_start_mounts_repo_from_container_dir(tmp_path):
         mock_proxy_cls.return_value = mock_proxy
 
         with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = _completed()
             with patch('shutil.copy'):
                 try:
                     vm.start()
                 except RuntimeError:
                     pass
 
-    run_calls = [c for c in mock_run.call_args_list if 'run' in c[0][0]]
-    assert run_calls
-    cmd = ' '.join(run_calls[0][0][0])
-    assert str(container_dir / 'repo') in cmd
-    assert ':/work/repo' in cmd
-
-
-def _run_argv(mock_run):
-    """Extract the container-runtime 'run' argv from a patched subprocess.run."""
-    return next(c[0][0] for c in mock_run.call_args_list if 'run' in c[0][0])
+    volumes = _volumes(_run_argv(mock_run))
+    assert volumes['/work/repo'] == f"{container_dir / 'repo'}:/work/repo"
 
 
-def test_start_with_live_mounts_emits_rw_and_ro(test_config, tmp_path):
+def test_start_with_live_mounts_emits_rw_and_ro(test_config, tmp_path, installed):
     """With mounts set, start() bind-mounts each dir at /work/<name>, honoring ro,
     and omits the read-only workspace mount and the /work/repo copy."""
     www = tmp_path / 'www'
@@ -863,12 +854,11 @@ def test_start_with_live_mounts_emits_rw_and_ro(test_config, tmp_path):
         Mount(host_path=www, name='www', read_only=False),
         Mount(host_path=shared, name='shared', read_only=True),
     ]
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(www, test_config, container_dir=tmp_path / 'cdir', mounts=mounts)
+    installed('docker')
+    vm = VMManager(www, test_config, container_dir=tmp_path / 'cdir', mounts=mounts)
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+        mock_run.return_value = _completed()
         with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
             mock_proxy = MagicMock()
             mock_proxy.start.return_value = 54321
@@ -881,21 +871,21 @@ def test_start_with_live_mounts_emits_rw_and_ro(test_config, tmp_path):
                     pass
 
     cmd = _run_argv(mock_run)
-    assert 'VIBEDOM_LIVE=1' in cmd
-    assert f'{www}:/work/www' in cmd
-    assert f'{shared}:/work/shared:ro' in cmd
-    assert not any(':/mnt/workspace:ro' in a for a in cmd)
-    assert not any(a.endswith(':/work/repo') for a in cmd)
+    volumes = _volumes(cmd)
+    assert 'VIBEDOM_LIVE=1' in _env_flags(cmd)
+    assert volumes['/work/www'] == f'{www}:/work/www'
+    assert volumes['/work/shared'] == f'{shared}:/work/shared:ro'
+    assert '/mnt/workspace' not in volumes
+    assert '/work/repo' not in volumes
 
 
-def test_start_without_mounts_still_mounts_workspace_ro(test_workspace, test_config, tmp_path):
+def test_start_without_mounts_still_mounts_workspace_ro(test_workspace, test_config, tmp_path, installed):
     """With no mounts, start() keeps the read-only workspace mount (unchanged)."""
-    with patch('shutil.which') as mock_which:
-        mock_which.side_effect = lambda cmd: '/usr/local/bin/docker' if cmd == 'docker' else None
-        vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
+    installed('docker')
+    vm = VMManager(test_workspace, test_config, session_dir=tmp_path / 'session')
 
     with patch('subprocess.run') as mock_run:
-        mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+        mock_run.return_value = _completed()
         with patch('vibedom.vm.ProxyManager') as mock_proxy_cls:
             mock_proxy = MagicMock()
             mock_proxy.start.return_value = 54321
@@ -908,6 +898,7 @@ def test_start_without_mounts_still_mounts_workspace_ro(test_workspace, test_con
                     pass
 
     cmd = _run_argv(mock_run)
-    assert f'{test_workspace}:/mnt/workspace:ro' in cmd
-    assert any(a.endswith(':/work/repo') for a in cmd)
-    assert 'VIBEDOM_LIVE=1' not in cmd
+    volumes = _volumes(cmd)
+    assert volumes['/mnt/workspace'] == f'{test_workspace}:/mnt/workspace:ro'
+    assert '/work/repo' in volumes
+    assert 'VIBEDOM_LIVE=1' not in _env_flags(cmd)
@@ -39,3 +39,11 @@ def test_create_default_whitelist():
         assert whitelist_path.exists()
         domains = load_whitelist(whitelist_path)
         assert 'api.anthropic.com' in domains
+
+def test_is_domain_allowed_matches_any_parent_suffix():
+    """Should match a whitelisted parent at any depth, case-insensitively"""
+    whitelist = {'example.co.uk'}
+
+    assert is_domain_allowed('a.b.Example.CO.uk', whitelist) is True
+    assert is_domain_allowed('co.uk', whitelist) is False
+    assert is_domain_allowed('notexample.co.uk', whitelist) is False
@@ -1,4 +1,4 @@
-from vibedom.words import generate_session_id
+from vibedom.words import generate_session_id, generate_session_ids
 
 def test_generate_session_id_format():
     sid = generate_session_id('myapp')
@@ -16,3 +16,14 @@ def test_generate_session_id_workspace_with_hyphens():
 def test_generate_session_id_is_random():
     ids = {generate_session_id('myapp') for _ in range(20)}
     assert len(ids) > 1  # should not always produce the same ID
+
+def test_generate_session_ids_batch_format():
+    ids = generate_session_ids('rabbitmq-talk', 5)
+    assert len(ids) == 5
+    for sid in ids:
+        assert sid.startswith('rabbitmq-talk-')
+        assert sid[len('rabbitmq-talk-'):].count('-') == 1
+
+def test_generate_session_ids_is_random():
+    ids = set(generate_session_ids('myapp', 20))
+    assert len(ids) > 1  # should not always produce the same ID